@@ -0,0 +1,262 @@
+import asyncio
+import time
+
+BOOT_STARTED = time.perf_counter()
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qsl
+import socketio
+from server import ClientError, Server
+from pipeline import prepare_frame, estimate_pose, submit_pose, finish_frame
+from config import ASYNC_INFERENCE_WORKERS
+
+# Asyncio entry point: socket I/O, decoding and tracking run on the event
+# loop and only pose estimation goes to the executor, so idle connections
+# cost a Session object and nothing else; a pose estimator is only
+# claimed once the client picks an exercise. Run with
+#   python async_main.py
+# or any ASGI server, e.g. `uvicorn async_main:app --port 8765`.
+
+sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+
+# With `python async_main.py`, spawned inference workers re-import this
+# script as __mp_main__; they need none of the server's state.
+if __name__ != "__mp_main__":
+    server = Server(BOOT_STARTED, reserve_on_open=False)
+    executor = ThreadPoolExecutor(max_workers=ASYNC_INFERENCE_WORKERS, thread_name_prefix="inference")
+    drains = {}
+
+
+async def run_blocking(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+async def broadcast_leaderboards():
+    while True:
+        await sio.sleep(server.rooms.interval)
+        for room, message in server.rooms.collect():
+            await sio.emit("leaderboard", message, to=room)
+
+
+async def emit_error(sid, e):
+    await sio.emit("error", {"message": str(e)}, to=sid)
+
+
+@sio.event
+async def connect(sid, environ, auth=None):
+    try:
+        server.connect(sid, auth)
+    except ClientError as e:
+        raise socketio.exceptions.ConnectionRefusedError(str(e))
+
+
+@sio.event
+async def disconnect(sid, reason=None):
+    server.rooms.leave(sid)
+    session = server.sessions.get(sid)
+    if session is None:
+        return
+    session.closed = True
+    task = drains.pop(sid, None)
+    if task is not None:
+        await task
+    await run_blocking(server.sessions.close, sid)
+    server.closed(session)
+
+
+@sio.event
+async def select_exercise(sid, data):
+    session = server.sessions.get(sid)
+    if session is None:
+        return
+    try:
+        exercise = server.check_exercise(session, data)
+    except ClientError as e:
+        await emit_error(sid, e)
+        return
+    # Building a pose graph is slow, so claim the estimator off the loop.
+    if not await run_blocking(server.sessions.reserve, session):
+        print("Client rejected: no pose estimator available")
+        await emit_error(sid, "Server busy, try again shortly")
+        return
+    await sio.emit("exercise_selected", server.select_exercise(session, exercise), to=sid)
+
+
+@sio.event
+async def join_room(sid, data):
+    session = server.sessions.get(sid)
+    if session is None:
+        return
+    try:
+        previous, snapshot = server.join_room(session, data)
+    except ClientError as e:
+        await emit_error(sid, e)
+        return
+    if previous is not None:
+        await sio.leave_room(sid, previous)
+    await sio.enter_room(sid, snapshot["room"])
+    if server.rooms.claim_ticker():
+        sio.start_background_task(broadcast_leaderboards)
+    await sio.emit("leaderboard", snapshot, to=sid)
+
+
+@sio.event
+async def leave_room(sid):
+    room = server.rooms.leave(sid)
+    if room is not None:
+        await sio.leave_room(sid, room)
+
+
+@sio.event
+async def update_format(sid, data):
+    session = server.sessions.get(sid)
+    if session is None:
+        return
+    try:
+        description = server.update_format(session, data)
+    except ClientError as e:
+        await emit_error(sid, e)
+        return
+    if description is not None:
+        await sio.emit("update_format", description, to=sid)
+
+
+@sio.event
+async def end_workout(sid):
+    session = server.sessions.get(sid)
+    if session is None:
+        print("No active tracker to end")
+        return
+    summary = server.end_workout(session)
+    if summary is not None:
+        await sio.emit("workout_summary", summary, to=sid)
+
+
+@sio.event
+async def get_rep_curve(sid, data):
+    session = server.sessions.get(sid)
+    if session is None:
+        return
+    curve = server.rep_curve(session, data)
+    if curve is not None:
+        await sio.emit("rep_curve", curve, to=sid)
+
+
+@sio.event
+async def get_history(sid, data=None):
+    session = server.sessions.get(sid)
+    if session is None or server.history is None:
+        return
+    try:
+        rows = await run_blocking(server.history_sessions, session.user, data or {})
+    except ClientError as e:
+        await emit_error(sid, e)
+        return
+    await sio.emit("history", rows, to=sid)
+
+
+@sio.event
+async def get_trends(sid, data=None):
+    session = server.sessions.get(sid)
+    if session is None or server.history is None:
+        return
+    try:
+        trends = await run_blocking(server.history_trends, session.user, data or {})
+    except ClientError as e:
+        await emit_error(sid, e)
+        return
+    await sio.emit("trends", trends, to=sid)
+
+
+@sio.event
+async def video_frame(sid, data):
+    session = server.sessions.get(sid)
+    if session is None or session.tracker is None:
+        return
+    server.receive_frame(session, data, time.time())
+    # One drain task per session; frames that arrive while it is busy just
+    # replace each other in the mailbox.
+    task = drains.get(sid)
+    if task is None or task.done():
+        drains[sid] = asyncio.create_task(drain(session))
+
+
+async def drain(session):
+    loop = asyncio.get_running_loop()
+    backend, metrics = server.sessions.backend, server.metrics
+    while True:
+        item = session.mailbox.take()
+        if item is None:
+            return
+        data, received = item
+        frame = prepare_frame(session, data, received, metrics)
+        if frame is None:
+            continue
+        try:
+            if frame.rgb is None:
+                landmark_array, elapsed = estimate_pose(backend, session, frame)
+            elif backend.streaming:
+                # Submitting is cheap, so keep draining; the result comes
+                # back through deliver_frame.
+                submit_pose(backend, session, frame, partial(deliver_frame, session, loop), metrics)
+                continue
+            else:
+                landmark_array, elapsed = await run_blocking(estimate_pose, backend, session, frame)
+        except Exception as e:
+            print(f"Pose estimation failed: {e}")
+            continue
+        await finish(session, frame, landmark_array, elapsed)
+
+
+def deliver_frame(session, loop, frame, landmark_array, elapsed):
+    # Called on the backend's result thread.
+    asyncio.run_coroutine_threadsafe(finish(session, frame, landmark_array, elapsed), loop)
+
+
+async def finish(session, frame, landmark_array, elapsed):
+    payload = finish_frame(session, frame, landmark_array, elapsed, server.metrics)
+    if payload is None:
+        return
+    t = server.metrics.start()
+    await sio.emit("update", payload, to=session.sid)
+    server.metrics.lap("emit", t)
+    stats = server.rep_update(session)
+    if stats is not None:
+        await sio.emit("session_stats", stats, to=session.sid)
+
+
+async def http_app(scope, receive, send):
+    if scope["type"] != "http":
+        return
+    params = dict(parse_qsl(scope["query_string"].decode()))
+    if scope["path"].startswith("/history/"):
+        # History queries hit the database, so keep them off the loop.
+        status, content_type, body = await run_blocking(server.http_get, scope["path"], params)
+    else:
+        status, content_type, body = server.http_get(scope["path"], params)
+    body = body.encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def start():
+    # The port is bound by now; load and warm the model behind it.
+    server.start()
+
+
+def shutdown():
+    executor.shutdown(wait=False)
+    server.close()
+
+
+app = socketio.ASGIApp(sio, other_asgi_app=http_app, on_startup=start, on_shutdown=shutdown)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8765)
@@ -0,0 +1,129 @@
+import time
+from collections import Counter, deque
+from pushups import PushUpTracker
+from pullups import PullUpTracker
+from squats import SquatTracker
+from reps import SessionStats
+from features import SHOULDER_X, SHOULDER_Y, HIP_X, HIP_Y, WRIST_Y, LEFT_HIP_ANGLE
+from config import AUTO_WINDOW, AUTO_SWITCH_RATIO
+
+EXERCISES = {
+    "pushups": PushUpTracker,
+    "pullups": PullUpTracker,
+    "squats": SquatTracker,
+}
+
+
+def classify_pose(features):
+    shoulder_y, hip_y = features[SHOULDER_Y], features[HIP_Y]
+    torso_dx = abs(features[SHOULDER_X] - features[HIP_X])
+    torso_dy = hip_y - shoulder_y
+    if torso_dx > abs(torso_dy) and features[LEFT_HIP_ANGLE] > 140:
+        return "pushups"
+    if torso_dy > 0.1:
+        if features[WRIST_Y] < shoulder_y - 0.05:
+            return "pullups"
+        return "squats"
+    return None
+
+
+class AutoTracker:
+    def __init__(self, window=AUTO_WINDOW, switch_ratio=AUTO_SWITCH_RATIO, clock=time.time):
+        self.window = window
+        self.switch_ratio = switch_ratio
+        self.labels = deque(maxlen=window)
+        self.counts = Counter()
+        self.trackers = {name: cls(clock=clock) for name, cls in EXERCISES.items()}
+        self.state = "idle"
+        self.exercise = None
+        self.tracker = None
+        self.segments = []
+        self.stats = SessionStats()
+
+    @property
+    def rep_count(self):
+        return self.stats.count + (self.tracker.rep_count if self.tracker else 0)
+
+    @property
+    def reps(self):
+        return self.tracker.reps if self.tracker else []
+
+    @property
+    def current_rep(self):
+        return self.tracker.current_rep if self.tracker else None
+
+    def start(self, now=None):
+        self.state = "active"
+        self.labels.clear()
+        self.counts.clear()
+        self.exercise = None
+        self.tracker = None
+        self.segments = []
+        self.stats = SessionStats()
+
+    def stop(self):
+        self.state = "idle"
+        self.end_segment()
+        return merge_summaries(self.segments, self.stats)
+
+    def session_stats(self):
+        stats = SessionStats().merge(self.stats)
+        if self.tracker is not None:
+            stats.merge(self.tracker.reps.stats)
+        return stats.to_dict()
+
+    def end_segment(self):
+        if self.tracker is not None:
+            self.tracker.stop()
+            self.segments.append((self.exercise, self.tracker.reps))
+            self.stats.merge(self.tracker.reps.stats)
+            self.tracker = None
+
+    def classify(self, features):
+        if len(self.labels) == self.window:
+            self.counts[self.labels[0]] -= 1
+        label = classify_pose(features)
+        self.labels.append(label)
+        self.counts[label] += 1
+        if len(self.labels) < self.window:
+            return None
+        exercise, count = max(
+            ((name, self.counts[name]) for name in EXERCISES),
+            key=lambda item: item[1],
+        )
+        return exercise if count >= self.switch_ratio * self.window else None
+
+    def update(self, features, now=None):
+        if self.state != "active":
+            return
+        exercise = self.classify(features)
+        tracker = self.tracker
+        if exercise is not None and (
+            tracker is None or
+            (exercise != self.exercise and tracker.current_rep is None) or
+            tracker.state != "active"
+        ):
+            self.end_segment()
+            self.exercise = exercise
+            self.tracker = self.trackers[exercise]
+            self.tracker.start(now=now)
+            print(f"Auto mode: switched to {exercise}")
+        if self.tracker is not None:
+            self.tracker.update(features, now=now)
+
+
+def merge_summaries(segments, stats):
+    summary = stats.to_dict()
+    reps = []
+    for exercise, log in segments:
+        for rep in log.to_dicts(full=True):
+            rep["rep_id"] = len(reps) + 1
+            rep["exercise"] = exercise
+            reps.append(rep)
+    summary["reps_data"] = reps
+    summary["segments"] = [
+        {"exercise": exercise, "total_reps": len(log), "avg_score": log.stats.to_dict()["avg_score"]}
+        for exercise, log in segments
+        if len(log)
+    ]
+    return summary
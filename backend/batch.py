@@ -0,0 +1,138 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+from features import frame_features
+from filters import make_landmark_filter
+from frames import RoiCropper
+from inference import make_pose, run_pose
+from sessions import TRACKER_CLASSES
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v")
+
+
+def analyze_video(path, exercise):
+    # Trackers print as they count reps; send that to stderr so stdout stays
+    # the JSON summary.
+    with contextlib.redirect_stdout(sys.stderr):
+        return score_video(path, exercise)
+
+
+def score_video(path, exercise):
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video: {path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    tracker = TRACKER_CLASSES[exercise]()
+    pose = make_pose()
+    cropper = RoiCropper()
+    landmark_filter = make_landmark_filter()
+    tracker.start(now=0.0)
+    frame_index = 0
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            # Media time, not wall-clock time, so rep durations come out the
+            # same however fast the file is processed.
+            now = frame_index / fps
+            frame_index += 1
+            region, window = cropper.crop(frame)
+            landmarks = run_pose(pose, cv2.cvtColor(region, cv2.COLOR_BGR2RGB))
+            if landmarks is not None:
+                landmarks = cropper.to_frame(landmarks, window)
+            cropper.update(landmarks)
+            landmarks = landmark_filter(landmarks, now)
+            if landmarks is not None:
+                tracker.update(frame_features(landmarks), now=now)
+    finally:
+        capture.release()
+        pose.close()
+    return tracker.stop()
+
+
+def find_videos(paths):
+    """Returns (path, summary name) pairs.
+
+    Videos found in a directory are named by their path relative to it, so
+    a/set1.mp4 and b/set1.mp4 under the same directory get separate
+    summaries; videos given directly are named by their file name.
+    """
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith(VIDEO_EXTENSIONS):
+                        video = os.path.join(root, name)
+                        videos.append((video, os.path.relpath(video, path)))
+        else:
+            videos.append((path, os.path.basename(path)))
+    return videos
+
+
+def summary_path(name, output_dir):
+    return os.path.join(output_dir, os.path.splitext(name)[0] + ".json")
+
+
+def write_summary(summary, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score recorded workout videos offline.")
+    parser.add_argument("paths", nargs="+", help="video files or directories of videos")
+    parser.add_argument("-e", "--exercise", required=True, choices=sorted(TRACKER_CLASSES))
+    parser.add_argument("-o", "--output-dir", help="write one <video>.json summary per file here")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    videos = find_videos(args.paths)
+    if not videos:
+        parser.error("no videos found")
+    if args.output_dir:
+        outputs = {}
+        for path, name in videos:
+            output = summary_path(name, args.output_dir)
+            if output in outputs:
+                parser.error(f"{path} and {outputs[output]} would both be written to {output}")
+            outputs[output] = path
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    summaries = {}
+    failed = 0
+    workers = max(1, min(args.workers, len(videos)))
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+        futures = {
+            executor.submit(analyze_video, path, args.exercise): (path, name)
+            for path, name in videos
+        }
+        for future, (path, name) in futures.items():
+            try:
+                summary = future.result()
+            except Exception as e:
+                print(f"Failed to analyze {path}: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            print(f"{path}: {summary['total_reps']} reps, avg score {summary['avg_score']}", file=sys.stderr)
+            if args.output_dir:
+                write_summary(summary, summary_path(name, args.output_dir))
+            else:
+                summaries[path] = summary
+
+    if not args.output_dir:
+        json.dump(summaries, sys.stdout, indent=2)
+        print()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+import numpy as np
+from features import compute_features
+from filters import make_landmark_filter
+from sessions import TRACKER_CLASSES
+from traces import load_trace
+
+
+def trace_features(trace):
+    """Returns the features and timestamps the tracker sees for a trace."""
+    detected = ~np.isnan(trace.landmarks).any(axis=(1, 2))
+    landmarks = trace.landmarks[detected]
+    timestamps = trace.timestamps[detected]
+    if len(landmarks):
+        # Sequential, so it runs ahead of the timed loop like the features.
+        landmark_filter = make_landmark_filter()
+        landmarks = np.stack([landmark_filter(row, now) for row, now in zip(landmarks, timestamps)])
+    return compute_features(landmarks), timestamps
+
+
+def replay(trace, exercise=None):
+    tracker = TRACKER_CLASSES[exercise or trace.exercise]()
+    features, timestamps = trace_features(trace)
+    features = features.tolist()
+    timestamps = timestamps.tolist()
+    latencies = np.empty(len(features), dtype=np.int64)
+
+    start = trace.timestamps[0] if len(trace.timestamps) else 0.0
+    # Trackers print on every rep; keep that out of the timings.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        tracker.start(now=start)
+        for i, (row, now) in enumerate(zip(features, timestamps)):
+            t0 = time.perf_counter_ns()
+            tracker.update(row, now=now)
+            latencies[i] = time.perf_counter_ns() - t0
+        summary = tracker.stop()
+    return summary, latencies
+
+
+def result_row(summary, latencies):
+    total = latencies.sum() / 1e9
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) / 1e3 if len(latencies) else (0, 0, 0)
+    return {
+        "frames": len(latencies),
+        "fps": len(latencies) / total if total else 0.0,
+        "p50_us": p50,
+        "p95_us": p95,
+        "p99_us": p99,
+        "total_reps": summary["total_reps"],
+        "avg_score": summary["avg_score"],
+        "scores": [rep["score"] for rep in summary["reps_data"]],
+    }
+
+
+def compare(result, expected):
+    diffs = []
+    if result["total_reps"] != expected["total_reps"]:
+        diffs.append(f"reps {expected['total_reps']} -> {result['total_reps']}")
+    if result["avg_score"] != expected["avg_score"]:
+        diffs.append(f"avg score {expected['avg_score']} -> {result['avg_score']}")
+    changed = sum(1 for a, b in zip(result["scores"], expected.get("scores", [])) if a != b)
+    if changed:
+        diffs.append(f"{changed} rep scores changed")
+    return diffs
+
+
+def find_traces(paths):
+    traces = []
+    for path in paths:
+        if os.path.isdir(path):
+            traces.extend(sorted(glob.glob(os.path.join(path, "**", "*.npz"), recursive=True)))
+        else:
+            traces.append(path)
+    return traces
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay landmark traces through the trackers.")
+    parser.add_argument("paths", nargs="+", help="trace files or directories of traces")
+    parser.add_argument("--baseline", help="compare rep counts and scores against this JSON file")
+    parser.add_argument("--write-baseline", help="store this run's rep counts and scores as a baseline")
+    parser.add_argument("--repeat", type=int, default=1, help="replay each trace this many times")
+    args = parser.parse_args(argv)
+
+    paths = find_traces(args.paths)
+    if not paths:
+        parser.error("no traces found")
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = 0
+    print(f"{'trace':40} {'frames':>7} {'fps':>10} {'p50us':>7} {'p95us':>7} {'p99us':>7} {'reps':>5} {'score':>6}")
+    for path in paths:
+        trace = load_trace(path)
+        name = os.path.basename(path)
+        latencies = []
+        for _ in range(args.repeat):
+            summary, run_latencies = replay(trace)
+            latencies.append(run_latencies)
+        result = results[name] = result_row(summary, np.concatenate(latencies))
+        print(
+            f"{name[:40]:40} {result['frames']:>7} {result['fps']:>10.0f} "
+            f"{result['p50_us']:>7.1f} {result['p95_us']:>7.1f} {result['p99_us']:>7.1f} "
+            f"{result['total_reps']:>5} {result['avg_score']:>6}"
+        )
+        if name in baseline:
+            diffs = compare(result, baseline[name])
+            if diffs:
+                regressions += 1
+                print(f"  DIFF: {', '.join(diffs)}")
+
+    if args.write_baseline:
+        with open(args.write_baseline, "w") as f:
+            json.dump(
+                {
+                    name: {key: r[key] for key in ("total_reps", "avg_score", "scores")}
+                    for name, r in results.items()
+                },
+                f,
+                indent=2,
+            )
+    if args.baseline:
+        missing = sorted(set(baseline) - set(results))
+        print(f"{len(results) - regressions}/{len(results)} traces match baseline"
+              + (f", {len(missing)} baseline traces not replayed" if missing else ""))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
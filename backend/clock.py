@@ -0,0 +1,56 @@
+import time
+from config import CLOCK_MAX_SKEW
+
+# Trackers take a clock (any zero-argument callable returning seconds) for
+# frames that arrive without a timestamp. The live server passes capture
+# times explicitly; replay tools pass media or trace time.
+wall_clock = time.time
+
+
+class ManualClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def set(self, now):
+        self.now = now
+
+    def advance(self, seconds):
+        self.now += seconds
+        return self.now
+
+
+class CaptureClock:
+    """Maps client capture timestamps (milliseconds) onto server time."""
+
+    def __init__(self, max_skew=CLOCK_MAX_SKEW):
+        self.max_skew = max_skew
+        self.offset = None
+        self.last = None
+
+    def reset(self):
+        self.offset = None
+        self.last = None
+
+    def stamp(self, captured_at=None, received=None):
+        if received is None:
+            received = time.time()
+        try:
+            now = float(captured_at) / 1000.0
+        except (TypeError, ValueError):
+            now = None
+        if now is None:
+            now = received
+        else:
+            # Anchor the client clock to ours on the first frame, and again
+            # if it jumps (clock change, tab suspended), so transport and
+            # queueing delay never show up in rep timing.
+            if self.offset is None or abs(now + self.offset - received) > self.max_skew:
+                self.offset = received - now
+            now += self.offset
+        if self.last is not None and now < self.last:
+            now = self.last
+        self.last = now
+        return now
@@ -24,4 +24,65 @@ SQUAT_MIN_DEPTH = 0.08
 SQUAT_MIN_REP_DURATION = 0.4
 SQUAT_MAX_HIP_ANGLE = 175
 SQUAT_MIN_HIP_BACK = 0.03
-SQUAT_MAX_HIP_ANGLE = 175
\ No newline at end of file
+SQUAT_MAX_HIP_ANGLE = 175
+POSE_MODEL_COMPLEXITY = 1
+MIN_DETECTION_CONFIDENCE = 0.7
+MIN_TRACKING_CONFIDENCE = 0.7
+POSE_POOL_SIZE = 4
+INFERENCE_BACKEND = "pool"
+# Relative paths are resolved against the backend directory.
+POSE_LANDMARKER_MODELS = {
+    0: "models/pose_landmarker_lite.task",
+    1: "models/pose_landmarker_full.task",
+    2: "models/pose_landmarker_heavy.task",
+}
+INFERENCE_WORKERS = 4
+INFERENCE_SLOTS_PER_WORKER = 2
+INFERENCE_MAX_SESSIONS = 32
+INFERENCE_MAX_WIDTH = 1280
+INFERENCE_MAX_HEIGHT = 720
+INFERENCE_TIMEOUT = 2.0
+WARMUP_POSES = 2
+WARMUP_TIMEOUT = 60.0
+TRACE_DIR = None
+TELEMETRY_CAPACITY = 9000
+TELEMETRY_MAX_REPS = 512
+TELEMETRY_DIR = None
+TELEMETRY_FORMAT = "npz"
+ROI_ENABLED = True
+ROI_PADDING = 0.25
+ROI_MIN_VISIBILITY = 0.5
+INFERENCE_SIZE = 384
+ADAPTIVE_QUALITY = True
+QUALITY_LEVELS = [(2, 1), (1, 1), (0, 1), (0, 2), (0, 3)]
+DEFAULT_QUALITY_LEVEL = 1
+LATENCY_BUDGET = 0.08
+LATENCY_HEADROOM = 0.5
+LATENCY_SMOOTHING = 0.2
+QUALITY_CHANGE_INTERVAL = 3.0
+AUTO_WINDOW = 20
+AUTO_SWITCH_RATIO = 0.7
+# Relative paths are resolved against the backend directory; None disables history.
+HISTORY_DB = "data/history.db"
+HISTORY_BATCH_SIZE = 50
+HISTORY_FLUSH_INTERVAL = 0.5
+CLOCK_MAX_SKEW = 5.0
+METRICS_ENABLED = True
+ASYNC_INFERENCE_WORKERS = 4
+LANDMARK_FILTER = True
+LANDMARK_MIN_CUTOFF = 3.0
+LANDMARK_BETA = 1.0
+LANDMARK_D_CUTOFF = 1.0
+LANDMARK_MAX_GAP = 1.0
+MOTION_GATE = True
+MOTION_SIZE = 64
+MOTION_THRESHOLD = 12
+MOTION_MIN_AREA = 0.01
+MOTION_REFRESH_INTERVAL = 1.0
+SPARSE_INFERENCE = False
+SPARSE_INTERVAL = 3
+SPARSE_MAX_SPEED = 0.6
+SPARSE_MAX_ERROR = 0.03
+SPARSE_VELOCITY_GAIN = 0.5
+LEADERBOARD_INTERVAL = 1.0
+MAX_ROOM_NAME = 64
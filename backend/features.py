@@ -0,0 +1,91 @@
+import numpy as np
+
+NOSE = 0
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_ELBOW, RIGHT_ELBOW = 13, 14
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE, RIGHT_KNEE = 25, 26
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+
+ANGLE_JOINTS = np.array([
+    (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+    (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+    (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+    (RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
+    (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+    (RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+])
+
+MIDPOINT_JOINTS = np.array([
+    (LEFT_SHOULDER, RIGHT_SHOULDER),
+    (LEFT_HIP, RIGHT_HIP),
+    (LEFT_WRIST, RIGHT_WRIST),
+    (LEFT_KNEE, RIGHT_KNEE),
+])
+
+(
+    LEFT_ELBOW_ANGLE,
+    RIGHT_ELBOW_ANGLE,
+    LEFT_HIP_ANGLE,
+    RIGHT_HIP_ANGLE,
+    LEFT_KNEE_ANGLE,
+    RIGHT_KNEE_ANGLE,
+    SHOULDER_X,
+    HIP_X,
+    WRIST_X,
+    KNEE_X,
+    SHOULDER_Y,
+    HIP_Y,
+    WRIST_Y,
+    KNEE_Y,
+    SHOULDER_VISIBILITY,
+    HIP_VISIBILITY,
+    WRIST_VISIBILITY,
+    KNEE_VISIBILITY,
+    ELBOW_ANGLE,
+    KNEE_ANGLE,
+    LEFT_WRIST_Y,
+    RIGHT_WRIST_Y,
+    CHIN_CLEARANCE,
+) = range(23)
+
+NUM_FEATURES = 23
+
+
+def joint_angles(landmarks):
+    points = landmarks[..., :3].astype(np.float64)
+    a = points[..., ANGLE_JOINTS[:, 0], :]
+    b = points[..., ANGLE_JOINTS[:, 1], :]
+    c = points[..., ANGLE_JOINTS[:, 2], :]
+    ba = a - b
+    bc = c - b
+    norms = np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1)
+    dot = np.einsum("...i,...i->...", ba, bc)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_angle = np.clip(dot / norms, -1.0, 1.0)
+    return np.where(norms > 0, np.degrees(np.arccos(cos_angle)), 0.0)
+
+
+def compute_features(landmarks):
+    landmarks = np.asarray(landmarks)
+    out = np.empty(landmarks.shape[:-2] + (NUM_FEATURES,), dtype=np.float64)
+    out[..., LEFT_ELBOW_ANGLE:SHOULDER_X] = joint_angles(landmarks)
+
+    pairs = landmarks[..., MIDPOINT_JOINTS, :].astype(np.float64).mean(axis=-2)
+    out[..., SHOULDER_X:SHOULDER_Y] = pairs[..., 0]
+    out[..., SHOULDER_Y:SHOULDER_VISIBILITY] = pairs[..., 1]
+    out[..., SHOULDER_VISIBILITY:ELBOW_ANGLE] = pairs[..., 3]
+
+    out[..., ELBOW_ANGLE] = (out[..., LEFT_ELBOW_ANGLE] + out[..., RIGHT_ELBOW_ANGLE]) / 2
+    out[..., KNEE_ANGLE] = (out[..., LEFT_KNEE_ANGLE] + out[..., RIGHT_KNEE_ANGLE]) / 2
+    out[..., LEFT_WRIST_Y] = landmarks[..., LEFT_WRIST, 1]
+    out[..., RIGHT_WRIST_Y] = landmarks[..., RIGHT_WRIST, 1]
+    out[..., CHIN_CLEARANCE] = landmarks[..., NOSE, 1] - out[..., WRIST_Y]
+    return out
+
+
+def frame_features(landmarks):
+    # Trackers do scalar arithmetic on these, which is much cheaper on plain
+    # floats than on numpy scalars.
+    return compute_features(landmarks).tolist()
@@ -0,0 +1,169 @@
+import math
+import numpy as np
+from features import ANGLE_JOINTS, MIDPOINT_JOINTS, NOSE
+from config import LANDMARK_FILTER, LANDMARK_MIN_CUTOFF, LANDMARK_BETA, LANDMARK_D_CUTOFF, LANDMARK_MAX_GAP
+from config import SMOOTHING_WINDOW
+from config import SPARSE_INTERVAL, SPARSE_MAX_SPEED, SPARSE_MAX_ERROR, SPARSE_VELOCITY_GAIN
+
+MIN_DT = 1e-3
+
+# The joints the trackers' features are built from; prediction error and
+# speed are only judged on these.
+FEATURE_JOINTS = np.unique(np.concatenate([ANGLE_JOINTS.ravel(), MIDPOINT_JOINTS.ravel(), [NOSE]]))
+
+
+def smoothing_factor(dt, cutoff):
+    r = 2 * math.pi * cutoff * dt
+    return r / (r + 1)
+
+
+class LandmarkFilter:
+    """One-Euro filter over the x, y, z of all landmarks at once.
+
+    Slow movement is smoothed hard (min_cutoff) to remove jitter, and the
+    cutoff rises with speed (beta) so fast movement is not lagged.
+    Visibility passes through unfiltered.
+    """
+
+    def __init__(
+        self,
+        min_cutoff=LANDMARK_MIN_CUTOFF,
+        beta=LANDMARK_BETA,
+        d_cutoff=LANDMARK_D_CUTOFF,
+        max_gap=LANDMARK_MAX_GAP,
+    ):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_gap = max_gap
+        self.reset()
+
+    def reset(self):
+        self.position = None
+        self.velocity = None
+        self.last_time = None
+
+    def __call__(self, landmarks, now):
+        if landmarks is None:
+            return None
+        points = landmarks[:, :3]
+        if self.position is None or now - self.last_time > self.max_gap:
+            # First frame, or the person was lost long enough that
+            # blending with the old position would only drag the new one.
+            self.position = points.astype(np.float64)
+            self.velocity = np.zeros_like(self.position)
+            self.last_time = now
+            return landmarks
+
+        dt = max(now - self.last_time, MIN_DT)
+        self.last_time = now
+        velocity = (points - self.position) / dt
+        self.velocity += smoothing_factor(dt, self.d_cutoff) * (velocity - self.velocity)
+        cutoff = self.min_cutoff + self.beta * np.abs(self.velocity)
+        r = (2 * math.pi * dt) * cutoff
+        self.position += r / (r + 1) * (points - self.position)
+
+        filtered = landmarks.copy()
+        filtered[:, :3] = self.position
+        return filtered
+
+
+class MovingAverageFilter:
+    """Mean x, y, z of each landmark over the last `window` detections.
+
+    The fallback when the One-Euro filter is turned off: the smoothing the
+    trackers used to do on their own features, done once on the landmarks.
+    """
+
+    def __init__(self, window=SMOOTHING_WINDOW, max_gap=LANDMARK_MAX_GAP):
+        self.window = window
+        self.max_gap = max_gap
+        self.points = None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.last_time = None
+
+    def __call__(self, landmarks, now):
+        if landmarks is None:
+            return None
+        if self.points is None:
+            self.points = np.zeros((self.window,) + landmarks[:, :3].shape)
+        if self.last_time is not None and now - self.last_time > self.max_gap:
+            self.count = 0
+        self.last_time = now
+        self.points[self.count % self.window] = landmarks[:, :3]
+        self.count += 1
+        filtered = landmarks.copy()
+        filtered[:, :3] = self.points[:min(self.count, self.window)].mean(axis=0)
+        return filtered
+
+
+def make_landmark_filter():
+    return LandmarkFilter() if LANDMARK_FILTER else MovingAverageFilter()
+
+
+class LandmarkPredictor:
+    """Constant-velocity landmark prediction between sparse inferences.
+
+    Each detection updates a per-joint velocity estimate (an alpha-beta
+    filter with a fixed gain). In between, landmarks are extrapolated from
+    the last detection. Inference runs every `interval` frames, and on
+    every frame while the body moves fast or the last prediction missed.
+    """
+
+    def __init__(
+        self,
+        interval=SPARSE_INTERVAL,
+        max_speed=SPARSE_MAX_SPEED,
+        max_error=SPARSE_MAX_ERROR,
+        gain=SPARSE_VELOCITY_GAIN,
+        max_gap=LANDMARK_MAX_GAP,
+    ):
+        self.interval = interval
+        self.max_speed = max_speed
+        self.max_error = max_error
+        self.gain = gain
+        self.max_gap = max_gap
+        self.reset()
+
+    def reset(self):
+        self.landmarks = None
+        self.velocity = None
+        self.last_time = None
+        self.predicted = 0
+        self.dense = True
+
+    def needs_inference(self, now):
+        return (
+            self.dense or
+            self.landmarks is None or
+            now - self.last_time > self.max_gap or
+            self.predicted + 1 >= self.interval
+        )
+
+    def predict(self, now):
+        self.predicted += 1
+        predicted = self.landmarks.copy()
+        predicted[:, :3] += self.velocity * (now - self.last_time)
+        return predicted
+
+    def observe(self, landmarks, now):
+        if landmarks is None:
+            self.reset()
+            return
+        points = landmarks[:, :3].astype(np.float64)
+        if self.landmarks is None or now - self.last_time > self.max_gap:
+            self.velocity = np.zeros_like(points)
+            self.dense = True
+        else:
+            dt = max(now - self.last_time, MIN_DT)
+            previous = self.landmarks[:, :3]
+            error = np.abs(points - (previous + self.velocity * dt))[FEATURE_JOINTS, :2].max()
+            self.velocity += self.gain * ((points - previous) / dt - self.velocity)
+            speed = np.abs(self.velocity[FEATURE_JOINTS, :2]).max()
+            self.dense = error > self.max_error or speed > self.max_speed
+        self.landmarks = landmarks
+        self.last_time = now
+        self.predicted = 0
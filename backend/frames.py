@@ -0,0 +1,143 @@
+import base64
+import cv2
+import numpy as np
+from config import ROI_ENABLED, ROI_PADDING, ROI_MIN_VISIBILITY, INFERENCE_SIZE
+from config import MOTION_SIZE, MOTION_THRESHOLD, MOTION_MIN_AREA, MOTION_REFRESH_INTERVAL
+
+
+def frame_buffer(data):
+    frame = data.get("frame") if isinstance(data, dict) else data
+    if not frame:
+        return None
+    if isinstance(frame, str):
+        # Legacy clients send a base64 data URL ("data:image/jpeg;base64,...").
+        return base64.b64decode(frame.split(",", 1)[-1])
+    return frame
+
+
+def decode_buffer(buf):
+    if buf is None:
+        return None
+    return cv2.imdecode(np.frombuffer(buf, np.uint8), cv2.IMREAD_COLOR)
+
+
+def decode_frame(data):
+    return decode_buffer(frame_buffer(data))
+
+
+class RoiCropper:
+    def __init__(
+        self,
+        size=INFERENCE_SIZE,
+        padding=ROI_PADDING,
+        min_visibility=ROI_MIN_VISIBILITY,
+        enabled=ROI_ENABLED,
+    ):
+        self.size = size
+        self.padding = padding
+        self.min_visibility = min_visibility
+        self.enabled = enabled
+        self.roi = None
+        self.frame_shape = None
+
+    def crop(self, frame):
+        height, width = frame.shape[:2]
+        if frame.shape != self.frame_shape:
+            self.roi = None
+            self.frame_shape = frame.shape
+        x0, y0, x1, y1 = self.roi or (0, 0, width, height)
+        region = frame[y0:y1, x0:x1]
+        crop_width, crop_height = x1 - x0, y1 - y0
+        scale = self.size / max(crop_width, crop_height)
+        if scale < 1:
+            region = cv2.resize(
+                region,
+                (max(1, round(crop_width * scale)), max(1, round(crop_height * scale))),
+                interpolation=cv2.INTER_AREA,
+            )
+        return region, (x0, y0, crop_width, crop_height, width, height)
+
+    def to_frame(self, landmarks, window):
+        x0, y0, crop_width, crop_height, width, height = window
+        mapped = landmarks.copy()
+        mapped[:, 0] = (landmarks[:, 0] * crop_width + x0) / width
+        mapped[:, 1] = (landmarks[:, 1] * crop_height + y0) / height
+        # MediaPipe's z uses roughly the same scale as x.
+        mapped[:, 2] = landmarks[:, 2] * crop_width / width
+        return mapped
+
+    def update(self, landmarks):
+        if not self.enabled or self.frame_shape is None:
+            return
+        if landmarks is None:
+            self.roi = None
+            return
+        visible = landmarks[landmarks[:, 3] >= self.min_visibility]
+        if len(visible) < 4:
+            self.roi = None
+            return
+
+        height, width = self.frame_shape[:2]
+        bx0, by0 = visible[:, 0].min() * width, visible[:, 1].min() * height
+        bx1, by1 = visible[:, 0].max() * width, visible[:, 1].max() * height
+        pad = self.padding * max(bx1 - bx0, by1 - by0)
+
+        # Keep the window still while the body stays well inside it; moving
+        # it every frame shifts the coordinates MediaPipe tracks and smooths in.
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            margin = pad / 2
+            if bx0 - margin >= x0 and by0 - margin >= y0 and bx1 + margin <= x1 and by1 + margin <= y1:
+                return
+
+        self.roi = (
+            max(0, int(bx0 - pad)),
+            max(0, int(by0 - pad)),
+            min(width, int(bx1 + pad) + 1),
+            min(height, int(by1 + pad) + 1),
+        )
+
+
+class MotionGate:
+    """Tells whether a frame differs enough from the last one sent to
+    inference to be worth running pose estimation on."""
+
+    def __init__(
+        self,
+        size=MOTION_SIZE,
+        threshold=MOTION_THRESHOLD,
+        min_area=MOTION_MIN_AREA,
+        refresh_interval=MOTION_REFRESH_INTERVAL,
+    ):
+        self.size = size
+        self.threshold = threshold
+        self.min_area = min_area
+        self.refresh_interval = refresh_interval
+        self.reset()
+
+    def reset(self):
+        self.reference = None
+        self.last_refresh = None
+
+    def is_static(self, frame, now):
+        height, width = frame.shape[:2]
+        scale = self.size / max(width, height)
+        small = cv2.resize(
+            frame,
+            (max(1, round(width * scale)), max(1, round(height * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        if (
+            self.reference is not None and
+            self.reference.shape == gray.shape and
+            now - self.last_refresh < self.refresh_interval
+        ):
+            # Compared against the last inferred frame rather than the
+            # previous one, so slow movement still adds up to a change.
+            diff = cv2.absdiff(gray, self.reference)
+            if np.count_nonzero(diff > self.threshold) < self.min_area * diff.size:
+                return True
+        self.reference = gray
+        self.last_refresh = now
+        return False
@@ -0,0 +1,268 @@
+import json
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from config import HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL
+
+DAY = 86400
+MAX_LIMIT = 100
+MAX_DAYS = 3650
+MAX_BUCKET_DAYS = 365
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL NOT NULL,
+    total_reps INTEGER NOT NULL,
+    full_reps INTEGER NOT NULL,
+    good_reps INTEGER NOT NULL,
+    partial_reps INTEGER NOT NULL,
+    poor_reps INTEGER NOT NULL,
+    avg_score REAL NOT NULL,
+    avg_duration REAL NOT NULL,
+    common_issues TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_user_time ON sessions (user, started_at);
+CREATE INDEX IF NOT EXISTS sessions_user_exercise_time ON sessions (user, exercise, started_at);
+
+CREATE TABLE IF NOT EXISTS reps (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    rep_id INTEGER NOT NULL,
+    exercise TEXT NOT NULL,
+    score REAL NOT NULL,
+    quality TEXT NOT NULL,
+    duration REAL NOT NULL,
+    flags TEXT NOT NULL,
+    PRIMARY KEY (session_id, rep_id)
+) WITHOUT ROWID;
+
+-- One row per user, exercise and day, kept up to date as sessions are
+-- written, so trend queries never have to scan individual reps.
+CREATE TABLE IF NOT EXISTS daily_stats (
+    user TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    sessions INTEGER NOT NULL,
+    reps INTEGER NOT NULL,
+    score_sum REAL NOT NULL,
+    duration_sum REAL NOT NULL,
+    PRIMARY KEY (user, exercise, day)
+) WITHOUT ROWID;
+"""
+
+UPSERT_DAILY = """
+INSERT INTO daily_stats (user, exercise, day, sessions, reps, score_sum, duration_sum)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user, exercise, day) DO UPDATE SET
+    sessions = sessions + excluded.sessions,
+    reps = reps + excluded.reps,
+    score_sum = score_sum + excluded.score_sum,
+    duration_sum = duration_sum + excluded.duration_sum
+"""
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def bounded(params, name, default, low, high, cast=float):
+    """Parses a client-supplied number and clamps it to [low, high]."""
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = math.nan
+    if math.isnan(number):
+        raise ValueError(f"{name} must be a number")
+    return cast(min(max(number, low), high))
+
+
+def exercise_param(params):
+    exercise = params.get("exercise")
+    if exercise is not None and not isinstance(exercise, str):
+        raise TypeError("exercise must be a string")
+    return exercise
+
+
+def sessions_query(params):
+    """sessions() arguments from a client's request parameters."""
+    return {
+        "exercise": exercise_param(params),
+        "before": bounded(params, "before", None, 0, math.inf),
+        "limit": bounded(params, "limit", 20, 1, MAX_LIMIT, int),
+    }
+
+
+def trends_query(params, now=None):
+    """trends() arguments from a client's request parameters."""
+    days = bounded(params, "days", 0, 0, MAX_DAYS)
+    return {
+        "exercise": exercise_param(params),
+        "since": (time.time() if now is None else now) - days * DAY if days else None,
+        "bucket_days": bounded(params, "bucket_days", 1, 1, MAX_BUCKET_DAYS, int),
+    }
+
+
+class HistoryStore:
+    def __init__(self, path, batch_size=HISTORY_BATCH_SIZE, flush_interval=HISTORY_FLUSH_INTERVAL):
+        # Not the working directory, which depends on how the server is started.
+        self.path = path = os.path.join(BACKEND_DIR, path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with connect(path) as conn:
+            conn.executescript(SCHEMA)
+        self.local = threading.local()
+        self.pending = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self.writer.start()
+
+    def record(self, user, exercise, started_at, summary, ended_at=None):
+        # Only queues the record; the writer thread does the disk I/O.
+        if ended_at is None:
+            ended_at = time.time()
+        self.pending.put((user, exercise, started_at, ended_at, summary))
+
+    def flush(self):
+        self.pending.join()
+
+    def close(self):
+        self.pending.put(None)
+        self.writer.join()
+
+    def _write_loop(self):
+        conn = connect(self.path)
+        running = True
+        while running:
+            item = self.pending.get()
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while item is not None and len(batch) < self.batch_size:
+                try:
+                    item = self.pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batch.append(item)
+            records = [record for record in batch if record is not None]
+            running = len(records) == len(batch)
+            try:
+                with conn:
+                    for record in records:
+                        self._insert(conn, *record)
+            except sqlite3.Error as e:
+                print(f"Failed to save {len(records)} workout(s) to history: {e}")
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+        conn.close()
+
+    def _insert(self, conn, user, exercise, started_at, ended_at, summary):
+        reps = summary.get("reps_data", [])
+        cursor = conn.execute(
+            "INSERT INTO sessions (user, exercise, started_at, ended_at, total_reps, full_reps, "
+            "good_reps, partial_reps, poor_reps, avg_score, avg_duration, common_issues) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                user, exercise, started_at, ended_at,
+                summary["total_reps"], summary["full_reps"], summary["good_reps"],
+                summary["partial_reps"], summary["poor_reps"],
+                summary["avg_score"], summary["avg_duration"],
+                json.dumps(summary["common_issues"]),
+            ),
+        )
+        session_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO reps (session_id, rep_id, exercise, score, quality, duration, flags) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    session_id, rep["rep_id"], rep.get("exercise", exercise), rep["score"],
+                    rep["quality"], rep["duration"], json.dumps(rep["flags"]),
+                )
+                for rep in reps
+            ],
+        )
+
+        # Auto-detect sessions contribute to the trend of each exercise done.
+        day = int(started_at // DAY) * DAY
+        totals = {}
+        for rep in reps:
+            counts = totals.setdefault(rep.get("exercise", exercise), [0, 0.0, 0.0])
+            counts[0] += 1
+            counts[1] += rep["score"]
+            counts[2] += rep["duration"]
+        conn.executemany(
+            UPSERT_DAILY,
+            [(user, name, day, 1, n, score, duration) for name, (n, score, duration) in totals.items()],
+        )
+
+    def _reader(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = connect(self.path)
+        return conn
+
+    def sessions(self, user, exercise=None, before=None, limit=20):
+        query = "SELECT * FROM sessions WHERE user = ?"
+        params = [user]
+        if exercise:
+            query += " AND exercise = ?"
+            params.append(exercise)
+        if before is not None:
+            query += " AND started_at < ?"
+            params.append(before)
+        query += " ORDER BY started_at DESC LIMIT ?"
+        params.append(limit)
+        rows = self._reader().execute(query, params).fetchall()
+        return [dict(row, common_issues=json.loads(row["common_issues"])) for row in rows]
+
+    def session_reps(self, user, session_id):
+        rows = self._reader().execute(
+            "SELECT r.rep_id, r.exercise, r.score, r.quality, r.duration, r.flags "
+            "FROM reps r JOIN sessions s ON s.id = r.session_id "
+            "WHERE r.session_id = ? AND s.user = ? ORDER BY r.rep_id",
+            (session_id, user),
+        ).fetchall()
+        return [dict(row, flags=json.loads(row["flags"])) for row in rows]
+
+    def trends(self, user, exercise=None, since=None, bucket_days=1):
+        bucket = max(1, int(bucket_days)) * DAY
+        query = (
+            "SELECT exercise, (day / ?) * ? AS period, SUM(sessions) AS sessions, SUM(reps) AS reps, "
+            "SUM(score_sum) AS score_sum, SUM(duration_sum) AS duration_sum "
+            "FROM daily_stats WHERE user = ?"
+        )
+        params = [bucket, bucket, user]
+        if exercise:
+            query += " AND exercise = ?"
+            params.append(exercise)
+        if since is not None:
+            query += " AND day >= ?"
+            params.append(int(since // DAY) * DAY)
+        query += " GROUP BY exercise, period ORDER BY exercise, period"
+
+        trends = {}
+        for row in self._reader().execute(query, params):
+            trends.setdefault(row["exercise"], []).append({
+                "date": row["period"],
+                "sessions": row["sessions"],
+                "total_reps": row["reps"],
+                "avg_score": round(row["score_sum"] / row["reps"], 1) if row["reps"] else 0,
+                "avg_duration": round(row["duration_sum"] / row["reps"], 2) if row["reps"] else 0,
+            })
+        return trends
@@ -0,0 +1,626 @@
+import itertools
+import os
+import queue
+import threading
+import time
+import multiprocessing
+from concurrent.futures import Future
+from functools import partial
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+import cv2
+import numpy as np
+from utils import landmarks_to_array
+from config import (
+    POSE_MODEL_COMPLEXITY,
+    MIN_DETECTION_CONFIDENCE,
+    MIN_TRACKING_CONFIDENCE,
+    POSE_POOL_SIZE,
+    INFERENCE_BACKEND,
+    INFERENCE_WORKERS,
+    INFERENCE_SLOTS_PER_WORKER,
+    INFERENCE_MAX_SESSIONS,
+    INFERENCE_MAX_WIDTH,
+    INFERENCE_MAX_HEIGHT,
+    INFERENCE_TIMEOUT,
+    INFERENCE_SIZE,
+    WARMUP_POSES,
+    WARMUP_TIMEOUT,
+    POSE_LANDMARKER_MODELS,
+    ADAPTIVE_QUALITY,
+    QUALITY_LEVELS,
+    DEFAULT_QUALITY_LEVEL,
+)
+
+
+def make_pose(model_complexity=POSE_MODEL_COMPLEXITY):
+    import mediapipe as mp
+    return mp.solutions.pose.Pose(
+        static_image_mode=False,
+        model_complexity=model_complexity,
+        smooth_landmarks=True,
+        min_detection_confidence=MIN_DETECTION_CONFIDENCE,
+        min_tracking_confidence=MIN_TRACKING_CONFIDENCE,
+    )
+
+
+def run_pose(pose, rgb):
+    results = pose.process(rgb)
+    if not results.pose_landmarks:
+        return None
+    return landmarks_to_array(results.pose_landmarks.landmark)
+
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def landmarker_model(complexity):
+    # Not the working directory, which depends on how the server is started.
+    return os.path.join(BACKEND_DIR, POSE_LANDMARKER_MODELS[complexity])
+
+
+def reachable_complexities():
+    """Model complexities the quality controller can ask for, default first."""
+    if ADAPTIVE_QUALITY:
+        complexities = {complexity for complexity, _ in QUALITY_LEVELS}
+    else:
+        complexities = {QUALITY_LEVELS[DEFAULT_QUALITY_LEVEL][0]}
+    complexities.add(POSE_MODEL_COMPLEXITY)
+    return sorted(complexities, key=lambda complexity: complexity != POSE_MODEL_COMPLEXITY)
+
+
+def warmup_frame(size=INFERENCE_SIZE):
+    # Any image will do: the first process() call is what initializes the
+    # graph's calculators and the inference runtime.
+    return np.full((size, size, 3), 128, dtype=np.uint8)
+
+
+class PosePool:
+    def __init__(self, factory, size):
+        self.factory = factory
+        self.size = size
+        self.created = 0
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+            if self.created >= self.size:
+                return None
+            self.created += 1
+        try:
+            return self.factory()
+        except Exception:
+            with self.lock:
+                self.created -= 1
+            raise
+
+    def release(self, pose):
+        # The graph keeps tracking state from the previous client, so start
+        # the next checkout from a clean run.
+        pose.reset()
+        with self.lock:
+            self.idle.append(pose)
+
+    def available(self):
+        with self.lock:
+            return len(self.idle) + self.size - self.created
+
+    def preload(self, count, frame=None, run=run_pose):
+        """Builds up to count poses ahead of time, running frame through each."""
+        poses = []
+        for _ in range(min(count, self.size)):
+            pose = self.acquire()
+            if pose is None:
+                break
+            poses.append(pose)
+        for pose in poses:
+            if frame is not None:
+                run(pose, frame)
+            self.release(pose)
+        return len(poses)
+
+
+class PoolPoseBackend:
+    # Streaming backends also offer submit(), which returns a Future instead
+    # of blocking until the pose is ready.
+    streaming = False
+    run = staticmethod(run_pose)
+
+    def __init__(self, factory, size):
+        self.factory = factory
+        self.size = size
+        self.pools = {}
+        self.poses = {}
+        # Complexities whose graph could not be built; sessions stay on the
+        # graph they have rather than retrying on every frame.
+        self.unavailable = set()
+        self.lock = threading.Lock()
+
+    def pool(self, complexity):
+        # One pool per model complexity, each as large as the session limit,
+        # so a session switching complexity never has to wait for a graph.
+        with self.lock:
+            pool = self.pools.get(complexity)
+            if pool is None:
+                pool = self.pools[complexity] = PosePool(partial(self.factory, complexity), self.size)
+            return pool
+
+    def open(self, key, complexity=POSE_MODEL_COMPLEXITY):
+        with self.lock:
+            if key in self.poses:
+                return True
+            if len(self.poses) >= self.size:
+                return False
+            self.poses[key] = None
+        try:
+            pose = self.pool(complexity).acquire()
+        except Exception:
+            with self.lock:
+                self.poses.pop(key, None)
+            raise
+        with self.lock:
+            self.poses[key] = (complexity, pose)
+        return True
+
+    def process(self, key, rgb, complexity=None):
+        with self.lock:
+            entry = self.poses.get(key)
+        if entry is None:
+            return None
+        if complexity is not None and complexity != entry[0]:
+            entry = self.switch(key, entry, complexity)
+        return self.run(entry[1], rgb)
+
+    def switch(self, key, entry, complexity):
+        if complexity in self.unavailable:
+            return entry
+        try:
+            pose = self.pool(complexity).acquire()
+        except Exception as e:
+            print(f"Model complexity {complexity} unavailable: {e!r}")
+            self.unavailable.add(complexity)
+            return entry
+        if pose is None:
+            return entry
+        with self.lock:
+            self.poses[key] = (complexity, pose)
+        self.pool(entry[0]).release(entry[1])
+        return complexity, pose
+
+    def load(self, count=WARMUP_POSES):
+        # Every complexity the quality controller can reach is built now,
+        # not on a frame-handling thread in the middle of a stream.
+        for complexity in reachable_complexities():
+            self.preload(complexity, count)
+
+    def warm_up(self, count=WARMUP_POSES):
+        frame = warmup_frame()
+        for complexity in reachable_complexities():
+            if complexity not in self.unavailable:
+                self.preload(complexity, count, frame)
+
+    def preload(self, complexity, count, frame=None):
+        try:
+            self.pool(complexity).preload(count, frame, run=self.run)
+        except Exception as e:
+            if complexity == POSE_MODEL_COMPLEXITY:
+                raise
+            print(f"Model complexity {complexity} unavailable: {e!r}")
+            self.unavailable.add(complexity)
+
+    def close(self, key):
+        with self.lock:
+            entry = self.poses.pop(key, None)
+        if entry is not None:
+            self.pool(entry[0]).release(entry[1])
+
+    def shutdown(self):
+        for key in list(self.poses):
+            self.close(key)
+
+
+def _inference_worker(shm_name, slots, slot_size, tasks, results):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray((slots, slot_size), dtype=np.uint8, buffer=shm.buf)
+    poses = {}
+    # Idle graphs per complexity: built (and warmed) before any session
+    # asked for one, or given up by a session that closed or switched
+    # complexity. Like PosePool's idle list, so switching back and forth
+    # never builds a graph in the middle of a stream.
+    spares = {}
+    failed = set()
+
+    def release(complexity, pose):
+        pose.reset()
+        spares.setdefault(complexity, []).append(pose)
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            op, key = task[0], task[1]
+            if op == "close":
+                entry = poses.pop(key, None)
+                if entry is not None:
+                    release(*entry)
+                continue
+            if op == "warm":
+                request_id, complexity, run = task[2:]
+                try:
+                    idle = spares.setdefault(complexity, [])
+                    if not idle:
+                        idle.append(make_pose(complexity))
+                    pose = idle[-1]
+                    if run:
+                        run_pose(pose, warmup_frame())
+                        pose.reset()
+                    results.put((request_id, None, None))
+                except Exception as e:
+                    failed.add(complexity)
+                    results.put((request_id, None, str(e)))
+                continue
+            request_id, slot, height, width, complexity = task[2:]
+            try:
+                entry = poses.get(key)
+                if complexity in failed:
+                    complexity = entry[0] if entry is not None else POSE_MODEL_COMPLEXITY
+                if entry is None or entry[0] != complexity:
+                    try:
+                        idle = spares.get(complexity)
+                        pose = idle.pop() if idle else make_pose(complexity)
+                    except Exception as e:
+                        if entry is None:
+                            raise
+                        # Keep tracking on the current graph.
+                        print(f"Model complexity {complexity} unavailable: {e!r}")
+                        failed.add(complexity)
+                    else:
+                        if entry is not None:
+                            release(*entry)
+                        entry = poses[key] = (complexity, pose)
+                pose = entry[1]
+                rgb = frames[slot, :height * width * 3].reshape(height, width, 3)
+                results.put((request_id, run_pose(pose, rgb), None))
+            except Exception as e:
+                results.put((request_id, None, str(e)))
+    finally:
+        for _, pose in poses.values():
+            pose.close()
+        for idle in spares.values():
+            for pose in idle:
+                pose.close()
+        del frames
+        shm.close()
+
+
+class ProcessPoseBackend:
+    streaming = False
+
+    def __init__(
+        self,
+        workers=INFERENCE_WORKERS,
+        slots_per_worker=INFERENCE_SLOTS_PER_WORKER,
+        max_sessions=INFERENCE_MAX_SESSIONS,
+        max_width=INFERENCE_MAX_WIDTH,
+        max_height=INFERENCE_MAX_HEIGHT,
+        timeout=INFERENCE_TIMEOUT,
+    ):
+        self.workers = workers
+        self.slots = workers * slots_per_worker
+        self.max_sessions = max_sessions
+        self.max_width = max_width
+        self.max_height = max_height
+        self.timeout = timeout
+        self.keys = {}
+        self.loads = [0] * workers
+        self.pending = {}
+        self.request_ids = itertools.count()
+        self.unavailable = set()
+        self.lock = threading.Lock()
+        self.started = False
+        self.stopping = False
+
+    def start(self):
+        # Started lazily: spawned workers re-import the launching script, so
+        # nothing may be spawned while a module is merely being imported.
+        with self.lock:
+            if self.started:
+                return
+            self.ctx = multiprocessing.get_context("spawn")
+            self.slot_size = self.max_width * self.max_height * 3
+            self.shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_size)
+            self.frames = np.ndarray((self.slots, self.slot_size), dtype=np.uint8, buffer=self.shm.buf)
+            self.free_slots = queue.Queue()
+            for slot in range(self.slots):
+                self.free_slots.put(slot)
+            self.results = self.ctx.Queue()
+            self.tasks = [self.ctx.Queue() for _ in range(self.workers)]
+            self.processes = [self._spawn(tasks) for tasks in self.tasks]
+            self.collector = threading.Thread(target=self._collect, daemon=True)
+            self.collector.start()
+            self.stopping = False
+            self.watcher = threading.Thread(target=self._watch, daemon=True)
+            self.watcher.start()
+            self.started = True
+
+    def _spawn(self, tasks):
+        process = self.ctx.Process(
+            target=_inference_worker,
+            args=(self.shm.name, self.slots, self.slot_size, tasks, self.results),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _watch(self):
+        # A worker that dies (a crash in the graph, the OOM killer) takes its
+        # queued requests with it. Fail them right away rather than letting
+        # each wait out the timeout, and start a replacement so the sessions
+        # on that worker carry on, their graphs rebuilt on the next frame.
+        while True:
+            sentinels = {process.sentinel: worker for worker, process in enumerate(self.processes)}
+            ready = wait(list(sentinels))
+            if self.stopping:
+                return
+            for sentinel in ready:
+                self._restart(sentinels[sentinel])
+
+    def _restart(self, worker):
+        process = self.processes[worker]
+        process.join(timeout=1)
+        exitcode = process.exitcode
+        with self.lock:
+            lost = [request_id for request_id, (_, _, owner) in self.pending.items() if owner == worker]
+            lost = [self.pending.pop(request_id) for request_id in lost]
+            # Anything still queued for the dead worker is among the lost
+            # requests; the replacement starts from an empty queue.
+            self.tasks[worker] = self.ctx.Queue()
+            self.processes[worker] = self._spawn(self.tasks[worker])
+        print(f"Inference worker {worker} exited ({exitcode}), restarted; {len(lost)} request(s) failed")
+        for future, slot, _ in lost:
+            if slot is not None:
+                self.free_slots.put(slot)
+            future.set_exception(RuntimeError(f"Inference worker {worker} exited"))
+
+    def _collect(self):
+        while True:
+            message = self.results.get()
+            if message is None:
+                break
+            request_id, landmarks, error = message
+            with self.lock:
+                future, slot, _ = self.pending.pop(request_id, (None, None, None))
+            if slot is not None:
+                self.free_slots.put(slot)
+            if future is None:
+                continue
+            if error:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(landmarks)
+
+    def load(self):
+        self.start()
+        self._warm(run=False)
+
+    def warm_up(self):
+        self._warm(run=True)
+
+    def _warm(self, run):
+        # Every worker builds a spare graph per reachable complexity (and
+        # with run, pushes a frame through it) in parallel; wait for all.
+        for complexity in reachable_complexities():
+            if complexity in self.unavailable:
+                continue
+            futures = []
+            for worker in range(self.workers):
+                future = Future()
+                request_id = next(self.request_ids)
+                with self.lock:
+                    self.pending[request_id] = (future, None, worker)
+                    self.tasks[worker].put(("warm", None, request_id, complexity, run))
+                futures.append(future)
+            try:
+                for future in futures:
+                    future.result(timeout=WARMUP_TIMEOUT)
+            except Exception as e:
+                if complexity == POSE_MODEL_COMPLEXITY:
+                    raise
+                print(f"Model complexity {complexity} unavailable: {e!r}")
+                self.unavailable.add(complexity)
+
+    def open(self, key):
+        self.start()
+        with self.lock:
+            if key in self.keys:
+                return True
+            if len(self.keys) >= self.max_sessions:
+                return False
+            # Sessions stick to one worker so its Pose graph keeps tracking
+            # the same video stream from frame to frame.
+            worker = self.loads.index(min(self.loads))
+            self.loads[worker] += 1
+            self.keys[key] = worker
+        return True
+
+    def submit(self, key, rgb, complexity=None):
+        with self.lock:
+            worker = self.keys.get(key)
+        if worker is None:
+            return None
+        height, width = rgb.shape[:2]
+        if width > self.max_width or height > self.max_height:
+            scale = min(self.max_width / width, self.max_height / height)
+            width, height = int(width * scale), int(height * scale)
+            rgb = cv2.resize(rgb, (width, height), interpolation=cv2.INTER_AREA)
+        try:
+            slot = self.free_slots.get(timeout=self.timeout)
+        except queue.Empty:
+            return None
+        self.frames[slot, :height * width * 3] = rgb.reshape(-1)
+        future = Future()
+        request_id = next(self.request_ids)
+        complexity = POSE_MODEL_COMPLEXITY if complexity is None else complexity
+        # Registered and queued together, so a worker restart cannot come in
+        # between and leave the request on the dead worker's queue.
+        with self.lock:
+            self.pending[request_id] = (future, slot, worker)
+            self.tasks[worker].put(("process", key, request_id, slot, height, width, complexity))
+        return future
+
+    def process(self, key, rgb, complexity=None):
+        future = self.submit(key, rgb, complexity)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=self.timeout)
+        except Exception as e:
+            print(f"Inference failed: {e!r}")
+            return None
+
+    def close(self, key):
+        with self.lock:
+            worker = self.keys.pop(key, None)
+            if worker is not None:
+                self.loads[worker] -= 1
+                self.tasks[worker].put(("close", key))
+
+    def shutdown(self):
+        if not self.started:
+            return
+        self.stopping = True
+        for tasks in self.tasks:
+            tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+        self.results.put(None)
+        self.collector.join(timeout=5)
+        del self.frames
+        self.shm.close()
+        self.shm.unlink()
+        self.started = False
+
+
+class LiveStreamPose:
+    """A MediaPipe Tasks PoseLandmarker in LIVE_STREAM mode.
+
+    detect() hands the frame to the landmarker and returns a Future that
+    the result callback fulfils. The landmarker skips frames that arrive
+    while it is busy and reports results in timestamp order, so when a
+    result comes in, the futures of any earlier frames still waiting were
+    skipped and are cancelled. A callback passed to detect() is attached
+    before the frame is handed over, so it always runs on the thread that
+    completes the Future, never on the caller's.
+    """
+
+    def __init__(self, model_complexity=POSE_MODEL_COMPLEXITY):
+        import mediapipe as mp
+        from mediapipe.tasks.python import BaseOptions, vision
+        self.mp = mp
+        self.pending = {}
+        self.last_timestamp = -1
+        self.lock = threading.Lock()
+        options = vision.PoseLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=landmarker_model(model_complexity)),
+            running_mode=vision.RunningMode.LIVE_STREAM,
+            num_poses=1,
+            min_pose_detection_confidence=MIN_DETECTION_CONFIDENCE,
+            min_pose_presence_confidence=MIN_DETECTION_CONFIDENCE,
+            min_tracking_confidence=MIN_TRACKING_CONFIDENCE,
+            result_callback=self.on_result,
+        )
+        self.landmarker = vision.PoseLandmarker.create_from_options(options)
+
+    def detect(self, rgb, now, callback=None):
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        with self.lock:
+            # Timestamps must keep increasing for the landmarker's whole
+            # life, and pooled landmarkers outlive sessions and their clocks.
+            timestamp = max(int(now * 1000), self.last_timestamp + 1)
+            self.last_timestamp = timestamp
+            self.pending[timestamp] = future
+        image = self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb))
+        try:
+            self.landmarker.detect_async(image, timestamp)
+        except Exception:
+            with self.lock:
+                self.pending.pop(timestamp, None)
+            raise
+        return future
+
+    def on_result(self, result, image, timestamp):
+        with self.lock:
+            finished = sorted(t for t in self.pending if t <= timestamp)
+            futures = [self.pending.pop(t) for t in finished]
+        if not futures:
+            return
+        for future in futures[:-1]:
+            future.cancel()
+        landmarks = landmarks_to_array(result.pose_landmarks[0]) if result.pose_landmarks else None
+        futures[-1].set_result(landmarks)
+
+    def reset(self):
+        # The Tasks API has no reset; just let go of anything still waiting.
+        with self.lock:
+            futures, self.pending = list(self.pending.values()), {}
+        for future in futures:
+            future.cancel()
+
+    def close(self):
+        self.reset()
+        self.landmarker.close()
+
+
+def detect_pose(pose, rgb):
+    return pose.detect(rgb, time.time()).result(timeout=WARMUP_TIMEOUT)
+
+
+class LiveStreamPoseBackend(PoolPoseBackend):
+    """Pooled LiveStreamPose landmarkers, one per session as with the pool."""
+
+    streaming = True
+    run = staticmethod(detect_pose)
+
+    def __init__(self, size):
+        super().__init__(LiveStreamPose, size)
+
+    def submit(self, key, rgb, complexity=None, now=None, callback=None):
+        with self.lock:
+            entry = self.poses.get(key)
+        if entry is None:
+            return None
+        if complexity is not None and complexity != entry[0]:
+            entry = self.switch(key, entry, complexity)
+        return entry[1].detect(rgb, time.time() if now is None else now, callback)
+
+    def process(self, key, rgb, complexity=None):
+        future = self.submit(key, rgb, complexity)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=INFERENCE_TIMEOUT)
+        except Exception as e:
+            print(f"Inference failed: {e!r}")
+            return None
+
+    def shutdown(self):
+        super().shutdown()
+        for pool in self.pools.values():
+            for pose in pool.idle:
+                pose.close()
+
+
+def make_backend(name=INFERENCE_BACKEND):
+    if name == "pool":
+        return PoolPoseBackend(make_pose, POSE_POOL_SIZE)
+    if name == "process":
+        return ProcessPoseBackend()
+    if name == "live_stream":
+        return LiveStreamPoseBackend(POSE_POOL_SIZE)
+    raise ValueError(f"Unknown inference backend: {name}")
@@ -0,0 +1,274 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+import cv2
+import numpy as np
+import socketio
+
+# Simulates streaming clients against a locally running server and reports
+# how latency, throughput and server resource use change as the number of
+# concurrent clients ramps up. Needs python-socketio's asyncio client
+# (pip install "python-socketio[asyncio_client]").
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def load_frames(path, limit, quality=80):
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    if path is None:
+        # Changing noise rather than a still frame, so the motion gate does
+        # not skip inference.
+        rng = np.random.default_rng(0)
+        return [
+            cv2.imencode(".jpg", rng.integers(0, 256, (480, 640, 3), dtype=np.uint8), params)[1].tobytes()
+            for _ in range(min(limit, 30))
+        ]
+    if os.path.isdir(path):
+        files = sorted(
+            f for f in glob.glob(os.path.join(path, "*"))
+            if f.lower().endswith((".jpg", ".jpeg"))
+        )[:limit]
+        frames = []
+        for name in files:
+            with open(name, "rb") as f:
+                frames.append(f.read())
+        return frames
+    capture = cv2.VideoCapture(path)
+    frames = []
+    try:
+        while len(frames) < limit:
+            ok, image = capture.read()
+            if not ok:
+                break
+            frames.append(cv2.imencode(".jpg", image, params)[1].tobytes())
+    finally:
+        capture.release()
+    return frames
+
+
+def process_tree(pid):
+    pids = [pid]
+    for child in pids:
+        # Children are listed under the thread that forked them, and the
+        # server starts its inference workers from a background thread.
+        for path in glob.glob(f"/proc/{child}/task/*/children"):
+            try:
+                with open(path) as f:
+                    pids.extend(int(p) for p in f.read().split())
+            except OSError:
+                pass
+    return pids
+
+
+def sample_usage(pid):
+    """Returns (cpu seconds, rss bytes) for pid and its children."""
+    cpu = rss = 0
+    for child in process_tree(pid):
+        try:
+            with open(f"/proc/{child}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+            rss += int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, IndexError, ValueError):
+            pass
+    return cpu, rss
+
+
+class StepStats:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.sent = 0
+        self.answered = 0
+        self.server_dropped = 0
+        self.latencies = []
+
+
+async def run_client(url, frames, exercise, fps, duration, stats, offset):
+    client = socketio.AsyncClient(reconnection=False)
+    pending = {}
+    dropped = 0
+    selected = asyncio.Event()
+
+    @client.on("exercise_selected")
+    async def on_selected(data):
+        selected.set()
+
+    @client.on("update")
+    async def on_update(data):
+        nonlocal dropped
+        sent_at = pending.pop(data.get("frame_id"), None)
+        if sent_at is not None:
+            stats.latencies.append(time.perf_counter() - sent_at)
+            stats.answered += 1
+        dropped = max(dropped, data.get("dropped_frames") or 0)
+
+    try:
+        await client.connect(url, transports=["websocket"], wait_timeout=10)
+        await client.emit("select_exercise", {"exercise": exercise})
+        await asyncio.wait_for(selected.wait(), timeout=30)
+    except Exception:
+        stats.failed += 1
+        await client.disconnect()
+        return
+    stats.connected += 1
+
+    interval = 1.0 / fps
+    # Stagger clients so they do not all send on the same tick.
+    await asyncio.sleep(interval * offset)
+    started = time.perf_counter()
+    frame_id = 0
+    while time.perf_counter() - started < duration:
+        pending[frame_id] = time.perf_counter()
+        await client.emit("video_frame", {
+            "frame": frames[frame_id % len(frames)],
+            "captured_at": time.time() * 1000,
+            "frame_id": frame_id,
+        })
+        stats.sent += 1
+        frame_id += 1
+        await asyncio.sleep(max(0.0, started + frame_id * interval - time.perf_counter()))
+    # Give in-flight frames a moment to come back before counting them lost.
+    await asyncio.sleep(min(2.0, 10 * interval))
+    stats.server_dropped += dropped
+    await client.disconnect()
+
+
+async def run_step(url, frames, exercise, fps, duration, clients, pid):
+    stats = StepStats()
+    usage = sample_usage(pid) if pid else None
+    started = time.perf_counter()
+    peak_rss = 0
+
+    async def watch():
+        nonlocal peak_rss
+        while True:
+            peak_rss = max(peak_rss, sample_usage(pid)[1])
+            await asyncio.sleep(0.5)
+
+    watcher = asyncio.create_task(watch()) if pid else None
+    await asyncio.gather(*(
+        run_client(url, frames, exercise, fps, duration, stats, i / clients)
+        for i in range(clients)
+    ))
+    elapsed = time.perf_counter() - started
+    if watcher is not None:
+        watcher.cancel()
+
+    latencies = np.array(stats.latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0, 0, 0)
+    row = {
+        "clients": clients,
+        "connected": stats.connected,
+        "failed": stats.failed,
+        "sent": stats.sent,
+        "answered": stats.answered,
+        "unanswered": stats.sent - stats.answered,
+        "server_dropped": stats.server_dropped,
+        "throughput": stats.answered / duration,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+    }
+    if usage is not None:
+        cpu = sample_usage(pid)[0] - usage[0]
+        row["cpu_percent"] = 100 * cpu / elapsed
+        row["rss_mb"] = peak_rss / 2**20
+    return row
+
+
+def wait_for_port(host, port, timeout, process=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and (process is None or process.poll() is None):
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def wait_for_ready(url, timeout, process=None):
+    # The server refuses clients until its model is loaded and warm.
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and (process is None or process.poll() is None):
+        try:
+            with urllib.request.urlopen(f"{url}/readyz", timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def start_server(script, port):
+    server = subprocess.Popen(
+        [sys.executable, script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL,
+    )
+    if not wait_for_port("127.0.0.1", port, timeout=60, process=server):
+        server.terminate()
+        raise RuntimeError(f"{script} did not start listening on port {port}")
+    if not wait_for_ready(f"http://127.0.0.1:{port}", timeout=120, process=server):
+        server.terminate()
+        raise RuntimeError(f"{script} did not become ready")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ramp up simulated streaming clients against a local server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", default="1,2,5,10,20", help="comma-separated concurrency steps")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of streaming per step")
+    parser.add_argument("--fps", type=float, default=10.0, help="frames per second per client")
+    parser.add_argument("-e", "--exercise", default="pushups")
+    parser.add_argument("--frames", help="directory of JPEGs or a video file to stream (default: synthetic)")
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--pid", type=int, help="server process to sample CPU and RSS from")
+    parser.add_argument("--start-server", metavar="SCRIPT", help="launch this server script (e.g. main.py) first")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.frames, args.max_frames)
+    if not frames:
+        parser.error("no frames found")
+    steps = [int(n) for n in args.clients.split(",")]
+    url = f"http://127.0.0.1:{args.port}"
+
+    server = start_server(args.start_server, args.port) if args.start_server else None
+    pid = server.pid if server else args.pid
+    results = []
+    try:
+        print(
+            f"{'clients':>7} {'ok':>5} {'sent':>7} {'answered':>8} {'lost':>6} {'fps':>8} "
+            f"{'p50ms':>7} {'p95ms':>7} {'p99ms':>7} {'cpu%':>6} {'rssMB':>7}"
+        )
+        for clients in steps:
+            row = asyncio.run(run_step(url, frames, args.exercise, args.fps, args.duration, clients, pid))
+            results.append(row)
+            print(
+                f"{row['clients']:>7} {row['connected']:>5} {row['sent']:>7} {row['answered']:>8} "
+                f"{row['unanswered']:>6} {row['throughput']:>8.1f} {row['p50_ms']:>7.1f} "
+                f"{row['p95_ms']:>7.1f} {row['p99_ms']:>7.1f} "
+                f"{row.get('cpu_percent', float('nan')):>6.0f} {row.get('rss_mb', float('nan')):>7.0f}"
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
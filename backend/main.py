@@ -1,13 +1,15 @@
-import cv2
-import mediapipe as mp
-import base64
-import numpy as np
-from flask import Flask
-from flask_socketio import SocketIO, emit
+import atexit
+import time
+from functools import partial
+
+# Taken before the heavy imports so the boot phase covers them.
+BOOT_STARTED = time.perf_counter()
+
+from flask import Flask, Response, request
+from flask_socketio import SocketIO, ConnectionRefusedError, emit, join_room, leave_room
 from flask_cors import CORS
-from pushups import PushUpTracker
-from pullups import PullUpTracker
-from squats import SquatTracker
+from server import ClientError, Server
+from pipeline import prepare_frame, estimate_pose, submit_pose, finish_frame
 from utils import avg
 from config import MIN_HIP_ANGLE, MIN_KNEE_ANGLE, PULLUP_MIN_HIP_ANGLE, PULLUP_MIN_KNEE_ANGLE
 
@@ -15,104 +17,185 @@ app = Flask(__name__)
 CORS(app)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(
-    static_image_mode=False,
-    model_complexity=1,
-    smooth_landmarks=True,
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.7,
-)
-
-pushup_tracker = PushUpTracker()
-pullup_tracker = PullUpTracker()
-squat_tracker = SquatTracker()
+# Spawned inference workers re-import this script as __mp_main__. They only
+# run the worker function, so none of the server's state is built there:
+# no backend, no history writer thread or database connection.
+if __name__ != "__mp_main__":
+    server = Server(BOOT_STARTED)
 
-trackers = {
-    "pushups": pushup_tracker,
-    "pullups": pullup_tracker,
-    "squats" : squat_tracker,
-}
-
-current_exercise = None
-tracker = None
+def broadcast_leaderboards():
+    while True:
+        socketio.sleep(server.rooms.interval)
+        for room, message in server.rooms.collect():
+            socketio.emit("leaderboard", message, to=room)
 
 @socketio.on("connect")
-def handle_connect():
-    print("Client connected")
+def handle_connect(auth=None):
+    try:
+        server.connect(request.sid, auth)
+    except ClientError as e:
+        raise ConnectionRefusedError(str(e))
 
 @socketio.on("disconnect")
 def handle_disconnect():
-    print("Client disconnected")
+    server.rooms.leave(request.sid)
+    session = server.sessions.close(request.sid)
+    if session is not None:
+        server.closed(session)
 
 @socketio.on("select_exercise")
 def handle_select_exercise(data):
-    global current_exercise, tracker
-    current_exercise = data.get("exercise")
-    tracker = trackers.get(current_exercise)
-    if tracker:
-        tracker.start()
-        print(f"Exercise selected: {current_exercise}")
-        emit("exercise_selected", {"exercise": current_exercise})
-    else:
-        print(f"Invalid exercise: {current_exercise}")
-        emit("error", {"message": "Invalid exercise"})
+    session = server.sessions.get(request.sid)
+    if session is None:
+        return
+    try:
+        exercise = server.check_exercise(session, data)
+    except ClientError as e:
+        emit("error", {"message": str(e)})
+        return
+    with session.lock:
+        selected = server.select_exercise(session, exercise)
+    emit("exercise_selected", selected)
+
+@socketio.on("join_room")
+def handle_join_room(data):
+    session = server.sessions.get(request.sid)
+    if session is None:
+        return
+    try:
+        previous, snapshot = server.join_room(session, data)
+    except ClientError as e:
+        emit("error", {"message": str(e)})
+        return
+    if previous is not None:
+        leave_room(previous)
+    join_room(snapshot["room"])
+    if server.rooms.claim_ticker():
+        socketio.start_background_task(broadcast_leaderboards)
+    emit("leaderboard", snapshot)
+
+@socketio.on("leave_room")
+def handle_leave_room():
+    room = server.rooms.leave(request.sid)
+    if room is not None:
+        leave_room(room)
+
+@socketio.on("update_format")
+def handle_update_format(data):
+    session = server.sessions.get(request.sid)
+    if session is None:
+        return
+    try:
+        with session.lock:
+            description = server.update_format(session, data)
+    except ClientError as e:
+        emit("error", {"message": str(e)})
+        return
+    if description is not None:
+        emit("update_format", description)
 
 @socketio.on("end_workout")
 def handle_end_workout():
-    global tracker
-    if tracker:
-        print("Ending workout and sending summary...")
-        summary = tracker.stop()
-        emit("workout_summary", summary)
-    else:
+    session = server.sessions.get(request.sid)
+    if session is None:
         print("No active tracker to end")
+        return
+    with session.lock:
+        summary = server.end_workout(session)
+    if summary is not None:
+        emit("workout_summary", summary)
 
-@socketio.on("video_frame")
-def handle_video_frame(data):
-    global tracker, current_exercise
-    if tracker is None:
+@socketio.on("get_rep_curve")
+def handle_get_rep_curve(data):
+    session = server.sessions.get(request.sid)
+    if session is None:
+        return
+    with session.lock:
+        curve = server.rep_curve(session, data)
+    if curve is not None:
+        emit("rep_curve", curve)
+
+@socketio.on("get_history")
+def handle_get_history(data=None):
+    session = server.sessions.get(request.sid)
+    if session is None or server.history is None:
+        return
+    try:
+        emit("history", server.history_sessions(session.user, data or {}))
+    except ClientError as e:
+        emit("error", {"message": str(e)})
+
+@socketio.on("get_trends")
+def handle_get_trends(data=None):
+    session = server.sessions.get(request.sid)
+    if session is None or server.history is None:
         return
     try:
-        frame_str = data.get("frame", "")
-        if not frame_str:
-            return
-        img_data = base64.b64decode(frame_str.split(",")[1])
-        np_arr = np.frombuffer(img_data, np.uint8)
-        frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-        if frame is None:
-            return
+        emit("trends", server.history_trends(session.user, data or {}))
+    except ClientError as e:
+        emit("error", {"message": str(e)})
+
+# Every HTTP endpoint (/history, /metrics, /healthz, /readyz) is served by
+# Server.http_get, shared with async_main.py.
+@app.route("/<path:path>")
+def handle_http(path):
+    status, content_type, body = server.http_get("/" + path, request.args)
+    return Response(body, status=status, content_type=content_type)
+
+def process_frame(session, data, received):
+    sessions, metrics = server.sessions, server.metrics
+    frame = prepare_frame(session, data, received, metrics)
+    if frame is None:
+        return None
+    if frame.rgb is not None and sessions.backend.streaming:
+        # The result arrives later, through deliver_frame.
+        submit_pose(sessions.backend, session, frame, partial(deliver_frame, session), metrics)
+        return None
+    try:
+        landmark_array, elapsed = estimate_pose(sessions.backend, session, frame)
     except Exception as e:
-        print(f"Error decoding frame: {e}")
+        print(f"Pose estimation failed: {e}")
+        return None
+    return finish_frame(session, frame, landmark_array, elapsed, metrics)
+
+def deliver_frame(session, frame, landmark_array, elapsed):
+    with session.lock:
+        payload = finish_frame(session, frame, landmark_array, elapsed, server.metrics)
+    if payload is not None:
+        publish(session, payload)
+
+def publish(session, payload):
+    t = server.metrics.start()
+    socketio.emit("update", payload, to=session.sid)
+    server.metrics.lap("emit", t)
+    stats = server.rep_update(session)
+    if stats is not None:
+        socketio.emit("session_stats", stats, to=session.sid)
+
+@socketio.on("video_frame")
+def handle_video_frame(data):
+    session = server.sessions.get(request.sid)
+    if session is None or session.tracker is None:
         return
+    server.receive_frame(session, data, time.time())
+
+    # Whichever handler holds the session lock drains the mailbox; everyone
+    # else just leaves their frame behind, replacing any unprocessed one.
+    while session.mailbox.pending() and session.lock.acquire(blocking=False):
+        try:
+            while True:
+                item = session.mailbox.take()
+                if item is None:
+                    break
+                payload = process_frame(session, *item)
+                if payload is not None:
+                    publish(session, payload)
+        finally:
+            session.lock.release()
 
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(rgb)
-
-    landmark_list = []
-    if results.pose_landmarks:
-        landmarks = results.pose_landmarks.landmark
-        tracker.update(landmarks)
-        landmark_list = [
-            {"x": l.x, "y": l.y, "visibility": l.visibility}
-            for l in landmarks
-        ]
-
-    feedback = ""
-    if tracker.reps:
-        last_rep = tracker.reps[-1]
-        flags = last_rep.get("flags") or []
-        if flags:
-            feedback = ", ".join(flags)
-
-    emit(
-        "update",
-        {
-            "rep_count": tracker.rep_count,
-            "feedback": feedback,
-            "landmarks": landmark_list,
-        },
-    )
+if __name__ != "__mp_main__":
+    server.start()
+    atexit.register(server.close)
 
 if __name__ == "__main__":
-    socketio.run(app, host="0.0.0.0", port=8765)
\ No newline at end of file
+    socketio.run(app, host="0.0.0.0", port=8765)
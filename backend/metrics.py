@@ -0,0 +1,130 @@
+import threading
+import time
+from bisect import bisect_left
+
+PREFIX = "chiseled"
+
+# Upper bounds in seconds; the last bucket (+Inf) is implicit.
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+COUNTERS = {
+    "frames_received_total": "Frames received from clients.",
+    "frames_dropped_total": "Frames replaced by a newer frame before being processed.",
+    "frames_skipped_total": "Frames skipped by adaptive quality control.",
+    "frames_unprocessed_total": "Frames the streaming pose backend skipped while busy with an earlier one.",
+    "frames_static_total": "Frames that reused the last pose because nothing moved.",
+    "frames_predicted_total": "Frames whose pose was predicted between sparse inferences.",
+    "frames_processed_total": "Frames run through pose estimation.",
+    "poses_detected_total": "Processed frames in which a pose was found.",
+}
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class FrameMetrics:
+    enabled = True
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.stages = {}
+        self.gauges = {}
+
+    def inc(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def start(self):
+        return time.perf_counter()
+
+    def lap(self, stage, started):
+        now = time.perf_counter()
+        self.observe(stage, now - started)
+        return now
+
+    def observe(self, stage, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self.lock:
+            series = self.stages.get(stage)
+            if series is None:
+                series = self.stages[stage] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    def gauge(self, name, help, read):
+        self.gauges[name] = (help, read)
+
+    def render(self):
+        with self.lock:
+            counters = dict(self.counters)
+            stages = {stage: (list(counts), total) for stage, (counts, total) in self.stages.items()}
+
+        lines = []
+        for name, help in COUNTERS.items():
+            lines += [
+                f"# HELP {PREFIX}_{name} {help}",
+                f"# TYPE {PREFIX}_{name} counter",
+                f"{PREFIX}_{name} {counters[name]}",
+            ]
+
+        processed = counters["frames_processed_total"]
+        gauges = dict(self.gauges)
+        gauges["pose_detection_ratio"] = (
+            "Share of processed frames in which a pose was found.",
+            lambda: counters["poses_detected_total"] / processed if processed else 0.0,
+        )
+        for name, (help, read) in gauges.items():
+            lines += [
+                f"# HELP {PREFIX}_{name} {help}",
+                f"# TYPE {PREFIX}_{name} gauge",
+                f"{PREFIX}_{name} {format_value(read())}",
+            ]
+
+        name = f"{PREFIX}_frame_stage_seconds"
+        lines += [
+            f"# HELP {name} Time spent in each stage of the frame pipeline.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, (counts, total) in sorted(stages.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines += [
+                f'{name}_bucket{{stage="{stage}",le="+Inf"}} {cumulative}',
+                f'{name}_sum{{stage="{stage}"}} {format_value(total)}',
+                f'{name}_count{{stage="{stage}"}} {cumulative}',
+            ]
+        return "\n".join(lines) + "\n"
+
+
+class NullMetrics:
+    """Stands in for FrameMetrics when metrics are disabled."""
+
+    enabled = False
+
+    def inc(self, name, amount=1):
+        pass
+
+    def start(self):
+        return 0.0
+
+    def lap(self, stage, started):
+        return 0.0
+
+    def observe(self, stage, seconds):
+        pass
+
+    def gauge(self, name, help, read):
+        pass
+
+
+def make_metrics(enabled):
+    return FrameMetrics() if enabled else NullMetrics()
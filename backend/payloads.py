@@ -0,0 +1,76 @@
+import numpy as np
+from utils import NUM_LANDMARKS
+
+# Normalized coordinates can fall slightly outside the frame, so the
+# quantized range is wider than [0, 1].
+LANDMARK_RANGE = (-1.0, 2.0)
+LANDMARK_LEVELS = 65535
+
+
+class FullUpdateEncoder:
+    def reset(self):
+        pass
+
+    def encode(self, rep_count, feedback, landmarks, **fields):
+        landmark_list = []
+        if landmarks is not None:
+            landmark_list = [
+                {"x": x, "y": y, "visibility": visibility}
+                for x, y, _, visibility in landmarks.tolist()
+            ]
+        return {
+            "rep_count": rep_count,
+            "feedback": feedback,
+            "landmarks": landmark_list,
+            **fields,
+        }
+
+
+class CompactUpdateEncoder:
+    def __init__(self, joints=None):
+        self.joints = np.arange(NUM_LANDMARKS) if joints is None else np.asarray(joints, dtype=np.intp)
+        low, high = LANDMARK_RANGE
+        self.offset = np.array([low, low, 0.0], dtype=np.float32)
+        self.scale = np.array(
+            [LANDMARK_LEVELS / (high - low)] * 2 + [LANDMARK_LEVELS], dtype=np.float32
+        )
+        self.last = {}
+
+    def describe(self):
+        return {
+            "format": "compact",
+            "joints": self.joints.tolist(),
+            "fields": ["x", "y", "visibility"],
+            "range": list(LANDMARK_RANGE),
+            "levels": LANDMARK_LEVELS,
+        }
+
+    def quantize(self, landmarks):
+        values = landmarks[self.joints][:, (0, 1, 3)]
+        packed = np.rint((values - self.offset) * self.scale)
+        return np.clip(packed, 0, LANDMARK_LEVELS).astype("<u2").tobytes()
+
+    def encode(self, rep_count, feedback, landmarks, **fields):
+        payload = {"landmarks": b"" if landmarks is None else self.quantize(landmarks)}
+        fields["rep_count"] = rep_count
+        fields["feedback"] = feedback
+        for key, value in fields.items():
+            if key not in self.last or self.last[key] != value:
+                payload[key] = self.last[key] = value
+        return payload
+
+    def reset(self):
+        self.last.clear()
+
+
+def make_encoder(options):
+    if not options or options.get("format", "full") == "full":
+        return FullUpdateEncoder()
+    if options.get("format") != "compact":
+        raise ValueError(f"Unknown update format: {options.get('format')}")
+    joints = options.get("joints")
+    if joints is not None:
+        joints = sorted(set(int(j) for j in joints))
+        if not joints or joints[0] < 0 or joints[-1] >= NUM_LANDMARKS:
+            raise ValueError("joints must be landmark indexes between 0 and 32")
+    return CompactUpdateEncoder(joints)
@@ -0,0 +1,161 @@
+import time
+from collections import namedtuple
+import cv2
+from features import frame_features
+from frames import decode_buffer, frame_buffer
+from telemetry import tracker_state
+
+# The frame pipeline, split around the pose estimation call so the threaded
+# server can run it inline and the asyncio server can hand inference to an
+# executor.
+
+
+PreparedFrame = namedtuple("PreparedFrame", ["rgb", "window", "now", "landmarks", "frame_id"])
+
+
+def prepare_frame(session, data, received, metrics):
+    if not session.quality.should_process():
+        metrics.inc("frames_skipped_total")
+        return None
+    if session.closed or session.tracker is None:
+        return None
+    if metrics.enabled:
+        metrics.observe("queue", time.time() - received)
+    # Rep timing follows the client's capture clock when it sends one.
+    captured_at = data.get("captured_at") if isinstance(data, dict) else None
+    now = session.clock.stamp(captured_at, received)
+    # Echoed back so a client can match an update to the frame it answers.
+    frame_id = data.get("frame_id") if isinstance(data, dict) else None
+
+    # Frames without an rgb image skip inference and carry stand-in
+    # landmarks, so the tracker and the client still see every frame.
+    predictor = session.predictor
+    if predictor is not None and not predictor.needs_inference(now):
+        metrics.inc("frames_predicted_total")
+        return PreparedFrame(None, None, now, predictor.predict(now), frame_id)
+
+    t = metrics.start()
+    try:
+        buf = frame_buffer(data)
+        t = metrics.lap("buffer", t)
+        frame = decode_buffer(buf)
+        t = metrics.lap("imdecode", t)
+        if frame is None:
+            return None
+    except Exception as e:
+        print(f"Error decoding frame: {e}")
+        return None
+
+    if session.motion_gate is not None:
+        static = session.motion_gate.is_static(frame, received)
+        t = metrics.lap("motion", t)
+        if static:
+            metrics.inc("frames_static_total")
+            return PreparedFrame(None, None, now, session.last_landmarks, frame_id)
+
+    region, window = session.cropper.crop(frame)
+    t = metrics.lap("crop", t)
+    rgb = cv2.cvtColor(region, cv2.COLOR_BGR2RGB)
+    metrics.lap("cvt_color", t)
+    return PreparedFrame(rgb, window, now, None, frame_id)
+
+
+def model_complexity(backend, quality):
+    # Complexities the backend failed to build are taken off the ladder, so
+    # the controller can still step up and down between the others.
+    if quality.model_complexity in backend.unavailable:
+        quality.cap(quality.model_complexity - 1)
+    return quality.model_complexity
+
+
+def estimate_pose(backend, session, frame):
+    if frame.rgb is None:
+        return frame.landmarks, None
+    complexity = model_complexity(backend, session.quality)
+    started = time.perf_counter()
+    landmark_array = backend.process(session.sid, frame.rgb, complexity)
+    return landmark_array, time.perf_counter() - started
+
+
+def submit_pose(backend, session, frame, deliver, metrics):
+    """Streaming counterpart of estimate_pose for backends with submit().
+
+    Returns at once; deliver(frame, landmarks, elapsed) runs on the
+    backend's result thread when the pose is ready, and never if the
+    backend skipped the frame for a newer one.
+    """
+    started = time.perf_counter()
+    complexity = model_complexity(backend, session.quality)
+
+    def done(future):
+        if future.cancelled():
+            metrics.inc("frames_unprocessed_total")
+            return
+        try:
+            landmark_array = future.result()
+        except Exception as e:
+            print(f"Pose estimation failed: {e}")
+            return
+        deliver(frame, landmark_array, time.perf_counter() - started)
+
+    # done is attached inside submit, before the frame reaches the backend:
+    # added afterwards, an already finished Future would run it right here,
+    # on the caller's thread and under the session lock deliver takes.
+    return backend.submit(session.sid, frame.rgb, complexity, frame.now, done) is not None
+
+
+def finish_frame(session, frame, landmark_array, elapsed, metrics):
+    # elapsed is None when the landmarks were reused or predicted.
+    tracker = session.tracker
+    if session.closed or tracker is None:
+        return None
+
+    now = frame.now
+    if elapsed is not None:
+        session.quality.record(elapsed)
+        metrics.observe("pose", elapsed)
+        metrics.inc("frames_processed_total")
+        if landmark_array is not None:
+            metrics.inc("poses_detected_total")
+            landmark_array = session.cropper.to_frame(landmark_array, frame.window)
+        session.cropper.update(landmark_array)
+        session.last_landmarks = landmark_array
+        if session.predictor is not None:
+            session.predictor.observe(landmark_array, now)
+    if session.recorder is not None:
+        session.recorder.add(now, landmark_array)
+
+    t = metrics.start()
+    landmark_array = session.landmark_filter(landmark_array, now)
+    t = metrics.lap("filter", t)
+    if landmark_array is not None:
+        features = frame_features(landmark_array)
+        t = metrics.lap("features", t)
+        tracker.update(features, now=now)
+        if session.telemetry is not None:
+            session.telemetry.record(now, features, tracker_state(tracker), tracker.rep_count)
+        t = metrics.lap("tracker", t)
+
+    feedback = tracker.reps.feedback if tracker.reps else ""
+
+    payload = session.encoder.encode(
+        tracker.rep_count,
+        feedback,
+        landmark_array,
+        exercise=getattr(tracker, "exercise", session.exercise),
+        dropped_frames=session.mailbox.dropped,
+        quality_level=session.quality.level,
+        model_complexity=session.quality.model_complexity,
+    )
+    if frame.frame_id is not None:
+        payload["frame_id"] = frame.frame_id
+    metrics.lap("encode", t)
+    return payload
+
+
+def rep_stats(session):
+    tracker = session.tracker
+    if tracker is None or tracker.rep_count == session.reported_reps:
+        return None
+    session.reported_reps = tracker.rep_count
+    return tracker.session_stats()
@@ -1,38 +1,57 @@
 import time
 from collections import deque
-from utils import angle_3d, avg, ValueSmoother
+from reps import RepLog
+from features import (
+    ELBOW_ANGLE,
+    LEFT_HIP_ANGLE,
+    LEFT_KNEE_ANGLE,
+    SHOULDER_Y,
+    HIP_X,
+    WRIST_Y,
+    LEFT_WRIST_Y,
+    RIGHT_WRIST_Y,
+    CHIN_CLEARANCE,
+)
 from config import *
 
 TARGET_HIP_ANGLE = 155
 HIP_TOLERANCE = 18
 
+REP_FIELDS = (
+    "start_time", "end_time", "start_shoulder_y", "min_shoulder_y",
+    "min_elbow_angle", "max_elbow_angle", "min_chin_clearance",
+    "min_hip_angle", "max_hip_angle", "kipped", "pull_height", "rom",
+)
+REP_FLAGS = (
+    "too fast", "go higher", "go a little higher", "chin all the way up",
+    "chin more up", "bend elbows more", "bend elbows", "dont swing",
+    "keep_back_straight",
+)
+
 
 class PullUpTracker:
-    def __init__(self):
+    def __init__(self, clock=time.time):
+        self.clock = clock
         self.state = "idle"
         self.motion_state = "down"
         self.rep_count = 0
-        self.reps = []
+        self.reps = RepLog(REP_FIELDS, REP_FLAGS)
         self.current_rep = None
         self.out_of_position_start = None
         self.last_transition_time = 0
-        self.elbow_smoother = ValueSmoother(SMOOTHING_WINDOW)
-        self.shoulder_smoother = ValueSmoother(SMOOTHING_WINDOW)
         self.hip_positions = deque(maxlen=5)
         self.kipping_frames = 0
         self.baseline_shoulder_y = None
         self.baseline_set_time = None
 
-    def start(self):
+    def start(self, now=None):
         self.state = "active"
         self.motion_state = "down"
         self.rep_count = 0
-        self.reps = []
+        self.reps = RepLog(REP_FIELDS, REP_FLAGS)
         self.current_rep = None
         self.out_of_position_start = None
-        self.last_transition_time = time.time()
-        self.elbow_smoother.clear()
-        self.shoulder_smoother.clear()
+        self.last_transition_time = self.clock() if now is None else now
         self.hip_positions.clear()
         self.kipping_frames = 0
         self.baseline_shoulder_y = None
@@ -40,64 +59,19 @@ class PullUpTracker:
 
     def stop(self):
         self.state = "idle"
-        full_reps = sum(1 for r in self.reps if r["quality"] == "full")
-        good_reps = sum(1 for r in self.reps if r["quality"] == "good")
-        partial_reps = sum(1 for r in self.reps if r["quality"] == "partial")
-        poor_reps = sum(1 for r in self.reps if r["quality"] == "poor")
-        avg_score = sum(r["score"] for r in self.reps) / len(self.reps) if self.reps else 0
-        avg_duration = sum(r["duration"] for r in self.reps) / len(self.reps) if self.reps else 0
-
-        all_flags = []
-        for rep in self.reps:
-            all_flags.extend(rep["flags"])
-
-        flag_counts = {}
-        for flag in all_flags:
-            flag_counts[flag] = flag_counts.get(flag, 0) + 1
-
-        return {
-            "total_reps": self.rep_count,
-            "full_reps": full_reps,
-            "good_reps": good_reps,
-            "partial_reps": partial_reps,
-            "poor_reps": poor_reps,
-            "avg_score": round(avg_score, 1),
-            "avg_duration": round(avg_duration, 2),
-            "common_issues": sorted(flag_counts.items(), key=lambda x: x[1], reverse=True)[:3],
-            "reps_data": self.reps
-        }
-
-    def in_pullup_position(self, landmarks):
-        ls = landmarks[11]
-        rs = landmarks[12]
-        lw = landmarks[15]
-        rw = landmarks[16]
-        shoulder_y = avg(ls.y, rs.y)
-        left_ok = lw.y < shoulder_y - 0.05
-        right_ok = rw.y < shoulder_y - 0.05
-        return left_ok or right_ok
+        return self.reps.summary()
 
-    def get_elbow_angle(self, landmarks):
-        ls, le, lw = landmarks[11], landmarks[13], landmarks[15]
-        rs, re, rw = landmarks[12], landmarks[14], landmarks[16]
-        return avg(angle_3d(ls, le, lw), angle_3d(rs, re, rw))
+    def session_stats(self):
+        return self.reps.stats.to_dict()
 
-    def get_chin_clearance(self, landmarks):
-        nose = landmarks[0]
-        lw, rw = landmarks[15], landmarks[16]
-        return nose.y - avg(lw.y, rw.y)
-
-    def get_body_alignment(self, landmarks):
-        ls = landmarks[11]
-        lh, lk, la = landmarks[23], landmarks[25], landmarks[27]
-        hip_angle = angle_3d(ls, lh, lk)
-        knee_angle = angle_3d(lh, lk, la)
-        return hip_angle, knee_angle
+    def in_pullup_position(self, features):
+        shoulder_y = features[SHOULDER_Y]
+        left_ok = features[LEFT_WRIST_Y] < shoulder_y - 0.05
+        right_ok = features[RIGHT_WRIST_Y] < shoulder_y - 0.05
+        return left_ok or right_ok
 
-    def detect_kipping(self, landmarks):
-        lh, rh = landmarks[23], landmarks[24]
-        hip_x = avg(lh.x, rh.x)
-        self.hip_positions.append(hip_x)
+    def detect_kipping(self, features):
+        self.hip_positions.append(features[HIP_X])
 
         if len(self.hip_positions) >= 3:
             velocity = abs(self.hip_positions[-1] - self.hip_positions[-3])
@@ -108,39 +82,38 @@ class PullUpTracker:
 
         return self.kipping_frames >= KIPPING_THRESHOLD
 
-    def update(self, landmarks):
+    def update(self, features, now=None):
         if self.state != "active":
             return True
+        if now is None:
+            now = self.clock()
 
-        elbow_angle = self.elbow_smoother.add(self.get_elbow_angle(landmarks))
-        ls, rs = landmarks[11], landmarks[12]
-        lw, rw = landmarks[15], landmarks[16]
-        shoulder_y = self.shoulder_smoother.add(avg(ls.y, rs.y))
+        elbow_angle = features[ELBOW_ANGLE]
+        shoulder_y = features[SHOULDER_Y]
 
         if self.baseline_shoulder_y is None:
-            if abs(lw.y - rw.y) < 0.05 and elbow_angle > 140:
+            if abs(features[LEFT_WRIST_Y] - features[RIGHT_WRIST_Y]) < 0.05 and elbow_angle > 140:
                 self.baseline_shoulder_y = shoulder_y
-                self.baseline_set_time = time.time()
+                self.baseline_set_time = now
             return True
 
-        if time.time() - self.baseline_set_time >= 3.0:
-            if not self.in_pullup_position(landmarks):
+        if now - self.baseline_set_time >= 3.0:
+            if not self.in_pullup_position(features):
                 if self.out_of_position_start is None:
-                    self.out_of_position_start = time.time()
-                elif time.time() - self.out_of_position_start >= 1.5:
+                    self.out_of_position_start = now
+                elif now - self.out_of_position_start >= 1.5:
                     self.stop()
                     return True
             else:
                 self.out_of_position_start = None
 
-        hip_angle, knee_angle = self.get_body_alignment(landmarks)
-        is_kipping = self.detect_kipping(landmarks)
+        hip_angle, knee_angle = features[LEFT_HIP_ANGLE], features[LEFT_KNEE_ANGLE]
+        is_kipping = self.detect_kipping(features)
 
-        current_time = time.time()
+        current_time = now
         time_since_transition = current_time - self.last_transition_time
 
-        wrist_y = avg(lw.y, rw.y)
-        arm_length = abs(shoulder_y - wrist_y)
+        arm_length = abs(shoulder_y - features[WRIST_Y])
         pull_threshold = arm_length * 0.35
 
         if self.motion_state == "down" and shoulder_y < self.baseline_shoulder_y - pull_threshold:
@@ -165,9 +138,8 @@ class PullUpTracker:
             self.current_rep["min_elbow_angle"] = min(self.current_rep["min_elbow_angle"], elbow_angle)
             self.current_rep["max_elbow_angle"] = max(self.current_rep["max_elbow_angle"], elbow_angle)
 
-            chin_clearance = self.get_chin_clearance(landmarks)
             self.current_rep["min_chin_clearance"] = min(
-                self.current_rep["min_chin_clearance"], chin_clearance
+                self.current_rep["min_chin_clearance"], features[CHIN_CLEARANCE]
             )
 
             self.current_rep["min_hip_angle"] = min(self.current_rep["min_hip_angle"], hip_angle)
@@ -1,132 +1,85 @@
 import time
-from utils import angle_3d, avg, ValueSmoother
+from reps import RepLog
+from features import ELBOW_ANGLE, LEFT_HIP_ANGLE, LEFT_KNEE_ANGLE, SHOULDER_Y, HIP_Y
 from config import *
 
+REP_FIELDS = (
+    "start_time", "end_time", "min_elbow_angle", "max_elbow_angle",
+    "start_shoulder_y", "max_shoulder_y", "min_hip_angle", "max_hip_angle",
+    "min_knee_angle", "descent_depth",
+)
+REP_FLAGS = (
+    "much lower", "go lower", "a little lower", "low movement",
+    "Back bent", "legs bent", "too fast",
+)
+
 class PushUpTracker:
-    def __init__(self):
+    def __init__(self, clock=time.time):
+        self.clock = clock
         self.state = "idle"
         self.motion_state = "up"
         self.rep_count = 0
-        self.reps = []
+        self.reps = RepLog(REP_FIELDS, REP_FLAGS)
         self.current_rep = None
         self.out_of_position_start = None
         self.last_transition_time = 0
-        self.elbow_smoother = ValueSmoother(SMOOTHING_WINDOW)
-        self.shoulder_smoother = ValueSmoother(SMOOTHING_WINDOW)
         self.initial_shoulder_y = None
 
-    def start(self):
+    def start(self, now=None):
         self.state = "active"
         self.motion_state = "up"
         self.rep_count = 0
-        self.reps = []
+        self.reps = RepLog(REP_FIELDS, REP_FLAGS)
         self.current_rep = None
         self.out_of_position_start = None
-        self.last_transition_time = time.time()
+        self.last_transition_time = self.clock() if now is None else now
         self.initial_shoulder_y = None
-        self.elbow_smoother.clear()
-        self.shoulder_smoother.clear()
 
     def stop(self):
         self.state = "idle"
+        return self.reps.summary()
 
-        full_reps = sum(1 for r in self.reps if r.get("quality") == "full")
-        good_reps = sum(1 for r in self.reps if r.get("quality") == "good")
-        partial_reps = sum(1 for r in self.reps if r.get("quality") == "partial")
-        poor_reps = sum(1 for r in self.reps if r.get("quality") == "poor")
-
-        avg_score = (
-            sum(r["score"] for r in self.reps) / len(self.reps)
-            if self.reps else 0
-        )
-
-        avg_duration = (
-            sum(r["duration"] for r in self.reps) / len(self.reps)
-            if self.reps else 0
-        )
-
-        all_flags = []
-        for r in self.reps:
-            all_flags.extend(r["flags"])
-
-        flag_counts = {}
-        for f in all_flags:
-            flag_counts[f] = flag_counts.get(f, 0) + 1
-
-        return {
-            "total_reps": self.rep_count,
-            "full_reps": full_reps,
-            "good_reps": good_reps,
-            "partial_reps": partial_reps,
-            "poor_reps": poor_reps,
-            "avg_score": round(avg_score, 1),
-            "avg_duration": round(avg_duration, 2),
-            "common_issues": sorted(flag_counts.items(), key=lambda x: x[1], reverse=True)[:3],
-            "reps_data": self.reps
-        }
-
+    def session_stats(self):
+        return self.reps.stats.to_dict()
 
     def get_session_data(self):
         return {
             "total_reps": self.rep_count,
-            "reps_data": self.reps
+            "reps_data": self.reps.to_dicts(full=True)
         }
 
-    def in_pushup_position(self, landmarks):
-        ls = landmarks[11]
-        rs = landmarks[12]
-        lh = landmarks[23]
-        rh = landmarks[24]
-        lk = landmarks[25]
-
-        hip_angle = angle_3d(ls, lh, lk)
-        shoulder_y = avg(ls.y, rs.y)
-        hip_y = avg(lh.y, rh.y)
-
+    def in_pushup_position(self, features):
+        shoulder_y = features[SHOULDER_Y]
         return (
-            hip_angle > 140 and
+            features[LEFT_HIP_ANGLE] > 140 and
             shoulder_y > 0.3 and
-            abs(shoulder_y - hip_y) < 0.3
-        )
-
-    def get_elbow_angle(self, landmarks):
-        ls, le, lw = landmarks[11], landmarks[13], landmarks[15]
-        rs, re, rw = landmarks[12], landmarks[14], landmarks[16]
-        return avg(
-            angle_3d(ls, le, lw),
-            angle_3d(rs, re, rw)
+            abs(shoulder_y - features[HIP_Y]) < 0.3
         )
 
-    def get_body_alignment(self, landmarks):
-        ls = landmarks[11]
-        lh, lk, la = landmarks[23], landmarks[25], landmarks[27]
-        hip_angle = angle_3d(ls, lh, lk)
-        knee_angle = angle_3d(lh, lk, la)
-        return hip_angle, knee_angle
-
-    def update(self, landmarks):
+    def update(self, features, now=None):
         if self.state != "active":
             return
+        if now is None:
+            now = self.clock()
 
-        if not self.in_pushup_position(landmarks):
+        if not self.in_pushup_position(features):
             if self.out_of_position_start is None:
-                self.out_of_position_start = time.time()
-            elif time.time() - self.out_of_position_start >= OUT_OF_POSITION_TIMEOUT:
+                self.out_of_position_start = now
+            elif now - self.out_of_position_start >= OUT_OF_POSITION_TIMEOUT:
                 print("ℹ️ SESSION STOPPED (out of position)")
                 self.stop()
                 return
         else:
             self.out_of_position_start = None
 
-        elbow_angle = self.elbow_smoother.add(self.get_elbow_angle(landmarks))
-        ls, rs = landmarks[11], landmarks[12]
-        shoulder_y = self.shoulder_smoother.add(avg(ls.y, rs.y))
+        elbow_angle = features[ELBOW_ANGLE]
+        shoulder_y = features[SHOULDER_Y]
 
         if self.initial_shoulder_y is None:
             self.initial_shoulder_y = shoulder_y
 
-        hip_angle, knee_angle = self.get_body_alignment(landmarks)
-        current_time = time.time()
+        hip_angle, knee_angle = features[LEFT_HIP_ANGLE], features[LEFT_KNEE_ANGLE]
+        current_time = now
         time_since_transition = current_time - self.last_transition_time
 
         if self.motion_state == "up" and elbow_angle < ELBOW_DOWN_ANGLE + 10:
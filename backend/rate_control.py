@@ -0,0 +1,105 @@
+import threading
+import time
+from config import (
+    ADAPTIVE_QUALITY,
+    QUALITY_LEVELS,
+    DEFAULT_QUALITY_LEVEL,
+    LATENCY_BUDGET,
+    LATENCY_HEADROOM,
+    LATENCY_SMOOTHING,
+    QUALITY_CHANGE_INTERVAL,
+)
+
+
+class LoadMonitor:
+    def __init__(self, smoothing=LATENCY_SMOOTHING):
+        self.smoothing = smoothing
+        self.latency = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.latency += self.smoothing * (seconds - self.latency)
+
+
+class QualityController:
+    def __init__(
+        self,
+        monitor,
+        levels=QUALITY_LEVELS,
+        level=DEFAULT_QUALITY_LEVEL,
+        budget=LATENCY_BUDGET,
+        headroom=LATENCY_HEADROOM,
+        smoothing=LATENCY_SMOOTHING,
+        interval=QUALITY_CHANGE_INTERVAL,
+        adaptive=ADAPTIVE_QUALITY,
+    ):
+        self.monitor = monitor
+        self.levels = levels
+        self.level = level
+        self.budget = budget
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.interval = interval
+        self.adaptive = adaptive
+        self.min_level = 0
+        self.latency = None
+        self.warmup_frames = 1
+        self.frame_index = 0
+        self.last_change = time.monotonic()
+
+    @property
+    def model_complexity(self):
+        return self.levels[self.level][0]
+
+    @property
+    def frame_stride(self):
+        return self.levels[self.level][1]
+
+    def should_process(self):
+        self.frame_index += 1
+        return self.frame_index % self.frame_stride == 0
+
+    def record(self, seconds, now=None):
+        # The first frame on a new graph pays its start-up cost; it says
+        # nothing about steady-state latency.
+        if self.warmup_frames:
+            self.warmup_frames -= 1
+            return
+        self.monitor.record(seconds)
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += self.smoothing * (seconds - self.latency)
+        if not self.adaptive:
+            return
+
+        now = time.monotonic() if now is None else now
+        if now - self.last_change < self.interval:
+            return
+        # Step down on this session's own latency so one slow client does not
+        # drag everyone else down; only step up when the whole server has room.
+        if self.latency > self.budget and self.level < len(self.levels) - 1:
+            self.set_level(self.level + 1, now)
+        elif (
+            self.level > self.min_level and
+            max(self.latency, self.monitor.latency) < self.budget * self.headroom
+        ):
+            self.set_level(self.level - 1, now)
+
+    def cap(self, complexity):
+        """Keeps to levels at or below complexity, e.g. after a model failed to load."""
+        self.min_level = next(
+            (i for i, (level_complexity, _) in enumerate(self.levels) if level_complexity <= complexity),
+            len(self.levels) - 1,
+        )
+        if self.level < self.min_level:
+            self.set_level(self.min_level)
+
+    def set_level(self, level, now=None):
+        self.level = level
+        self.frame_index = 0
+        self.latency = None
+        self.warmup_frames = 1
+        self.last_change = time.monotonic() if now is None else now
+        print(f"Quality level {level}: model_complexity={self.model_complexity}, frame_stride={self.frame_stride}")
@@ -0,0 +1,119 @@
+import math
+from array import array
+from collections import Counter
+
+QUALITIES = ("full", "good", "partial", "poor")
+
+
+class SessionStats:
+    __slots__ = ("count", "quality_counts", "score_sum", "duration_sum", "flag_counts")
+
+    def __init__(self):
+        self.count = 0
+        self.quality_counts = [0] * len(QUALITIES)
+        self.score_sum = 0.0
+        self.duration_sum = 0.0
+        self.flag_counts = Counter()
+
+    def add(self, score, duration, quality, flags):
+        self.count += 1
+        self.quality_counts[quality] += 1
+        self.score_sum += score
+        self.duration_sum += duration
+        self.flag_counts.update(flags)
+
+    def merge(self, other):
+        self.count += other.count
+        for i, n in enumerate(other.quality_counts):
+            self.quality_counts[i] += n
+        self.score_sum += other.score_sum
+        self.duration_sum += other.duration_sum
+        self.flag_counts.update(other.flag_counts)
+        return self
+
+    def to_dict(self):
+        return {
+            "total_reps": self.count,
+            "full_reps": self.quality_counts[0],
+            "good_reps": self.quality_counts[1],
+            "partial_reps": self.quality_counts[2],
+            "poor_reps": self.quality_counts[3],
+            "avg_score": round(self.score_sum / self.count, 1) if self.count else 0,
+            "avg_duration": round(self.duration_sum / self.count, 2) if self.count else 0,
+            "common_issues": sorted(self.flag_counts.items(), key=lambda x: x[1], reverse=True)[:3],
+        }
+
+
+class RepLog:
+    def __init__(self, fields, flags=()):
+        self.fields = fields
+        self.columns = {name: array("d") for name in fields}
+        # Fields recorded as booleans (e.g. kipped), turned back into bools
+        # when records are read out.
+        self.flag_fields = set()
+        self.score = array("d")
+        self.duration = array("d")
+        self.quality = array("b")
+        # Flags are stored as a bitmask over this vocabulary, declared in the
+        # order score() appends them so decoding keeps the original order.
+        self.flag_names = list(flags)
+        self.flag_bits = {name: i for i, name in enumerate(self.flag_names)}
+        self.flag_masks = array("Q")
+        self.stats = SessionStats()
+        # Feedback on the latest rep, sent with every frame until the next one.
+        self.feedback = ""
+
+    def __len__(self):
+        return len(self.score)
+
+    def __getitem__(self, index):
+        return self.record(range(len(self))[index])
+
+    def append(self, rep):
+        for name in self.fields:
+            value = rep.get(name, math.nan)
+            if isinstance(value, bool):
+                self.flag_fields.add(name)
+            self.columns[name].append(float(value))
+        quality = QUALITIES.index(rep["quality"])
+        mask = 0
+        for flag in rep["flags"]:
+            bit = self.flag_bits.get(flag)
+            if bit is None:
+                bit = self.flag_bits[flag] = len(self.flag_names)
+                self.flag_names.append(flag)
+            mask |= 1 << bit
+        self.score.append(rep["score"])
+        self.duration.append(rep["duration"])
+        self.quality.append(quality)
+        self.flag_masks.append(mask)
+        self.stats.add(self.score[-1], self.duration[-1], quality, rep["flags"])
+        self.feedback = ", ".join(rep["flags"])
+
+    def flags(self, index):
+        mask = self.flag_masks[index]
+        return [name for i, name in enumerate(self.flag_names) if mask >> i & 1]
+
+    def record(self, index, full=False):
+        score = self.score[index]
+        rep = {
+            "rep_id": index + 1,
+            "score": int(score) if score.is_integer() else score,
+            "quality": QUALITIES[self.quality[index]],
+            "duration": self.duration[index],
+            "flags": self.flags(index),
+        }
+        if full:
+            for name in self.fields:
+                value = self.columns[name][index]
+                if not math.isnan(value):
+                    rep[name] = bool(value) if name in self.flag_fields else value
+        return rep
+
+    def to_dicts(self, full=False):
+        return [self.record(i, full) for i in range(len(self))]
+
+    def summary(self):
+        summary = self.stats.to_dict()
+        summary["reps_data"] = self.to_dicts(full=True)
+        return summary
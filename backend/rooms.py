@@ -0,0 +1,116 @@
+import threading
+from config import LEADERBOARD_INTERVAL, MAX_ROOM_NAME
+
+
+class Room:
+    def __init__(self, name):
+        self.name = name
+        self.entries = {}
+        self.ids = {}
+        self.next_id = 1
+        self.version = 0
+        self.changed = set()
+        self.removed = set()
+
+    def snapshot(self):
+        return {
+            "room": self.name,
+            "version": self.version,
+            "full": True,
+            "entries": [dict(entry) for entry in self.entries.values()],
+        }
+
+
+class RoomRegistry:
+    """Group leaderboards, broadcast as coalesced diffs once per tick.
+
+    Sessions report in only when their rep count or exercise changes, and
+    collect() turns everything that changed since the last tick into one
+    message per room, so broadcast cost follows the tick rate rather than
+    participants times frame rate.
+    """
+
+    def __init__(self, interval=LEADERBOARD_INTERVAL):
+        self.interval = interval
+        self.rooms = {}
+        self.members = {}
+        self.ticking = False
+        self.lock = threading.Lock()
+
+    def claim_ticker(self):
+        # The broadcast loop is started on the first join, exactly once.
+        with self.lock:
+            if self.ticking:
+                return False
+            self.ticking = True
+            return True
+
+    def join(self, sid, room_name, display_name):
+        room_name = str(room_name).strip()[:MAX_ROOM_NAME]
+        if not room_name:
+            raise ValueError("Room name is required")
+        self.leave(sid)
+        with self.lock:
+            room = self.rooms.get(room_name)
+            if room is None:
+                room = self.rooms[room_name] = Room(room_name)
+            entry_id = room.next_id
+            room.next_id += 1
+            room.ids[sid] = entry_id
+            room.entries[entry_id] = {
+                "id": entry_id,
+                "name": str(display_name or f"Athlete {entry_id}")[:MAX_ROOM_NAME],
+                "exercise": None,
+                "total_reps": 0,
+                "avg_score": 0,
+            }
+            room.changed.add(entry_id)
+            self.members[sid] = room
+            return entry_id, room.snapshot()
+
+    def leave(self, sid):
+        with self.lock:
+            room = self.members.pop(sid, None)
+            if room is None:
+                return None
+            entry_id = room.ids.pop(sid)
+            del room.entries[entry_id]
+            room.changed.discard(entry_id)
+            room.removed.add(entry_id)
+            if not room.entries:
+                del self.rooms[room.name]
+            return room.name
+
+    def report(self, sid, exercise, stats):
+        with self.lock:
+            room = self.members.get(sid)
+            if room is None:
+                return
+            entry_id = room.ids[sid]
+            entry = room.entries[entry_id]
+            update = {
+                "exercise": exercise,
+                "total_reps": stats["total_reps"],
+                "avg_score": stats["avg_score"],
+            }
+            if any(entry[key] != value for key, value in update.items()):
+                entry.update(update)
+                room.changed.add(entry_id)
+
+    def collect(self):
+        messages = []
+        with self.lock:
+            for room in self.rooms.values():
+                if not room.changed and not room.removed:
+                    continue
+                room.version += 1
+                messages.append((room.name, {
+                    "room": room.name,
+                    "version": room.version,
+                    "full": False,
+                    "entries": [dict(room.entries[entry_id]) for entry_id in sorted(room.changed)],
+                    "removed": sorted(room.removed),
+                }))
+                room.changed.clear()
+                room.removed.clear()
+        return messages
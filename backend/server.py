@@ -0,0 +1,184 @@
+import json
+import re
+from history import HistoryStore, sessions_query, trends_query
+from inference import make_backend
+from metrics import make_metrics
+from payloads import make_encoder
+from pipeline import rep_stats
+from rooms import RoomRegistry
+from sessions import SessionManager
+from startup import Startup
+from config import HISTORY_DB, METRICS_ENABLED
+
+# /history/<user>, /history/<user>/sessions/<id> and /history/<user>/trends
+HISTORY_ROUTE = re.compile(r"/history/([^/]+)(?:/sessions/(\d+)|/(trends))?$")
+
+
+class ClientError(Exception):
+    """A request the server turns down; the message goes back to the client."""
+
+
+def json_response(status, payload):
+    return status, "application/json", json.dumps(payload)
+
+
+class Server:
+    """Socket and HTTP handling shared by main.py and async_main.py.
+
+    Handlers return what to send back and raise ClientError for requests
+    they turn down. Emitting, and any locking its concurrency model needs,
+    is left to each server, as with the frame path in pipeline.py.
+    """
+
+    def __init__(self, started=None, reserve_on_open=True):
+        self.sessions = SessionManager(make_backend(), reserve_on_open=reserve_on_open)
+        self.history = HistoryStore(HISTORY_DB) if HISTORY_DB else None
+        self.metrics = make_metrics(METRICS_ENABLED)
+        self.metrics.gauge("active_sessions", "Connected clients.", lambda: len(self.sessions))
+        self.rooms = RoomRegistry()
+        self.startup = Startup(started)
+
+    def start(self):
+        self.startup.start(self.sessions.backend)
+
+    def close(self):
+        # Writes are queued; let the writer finish them.
+        if self.history is not None:
+            self.history.close()
+
+    def connect(self, sid, auth=None):
+        if not self.startup.ready:
+            print("Client rejected: server still starting")
+            raise ClientError("Server is starting, try again shortly")
+        user = auth.get("user") if isinstance(auth, dict) else None
+        if self.sessions.open(sid, user) is None:
+            print("Client rejected: no pose estimator available")
+            raise ClientError("Server busy, try again shortly")
+        print(f"Client connected ({len(self.sessions)} active)")
+
+    def closed(self, session):
+        """Called once a disconnected client's session has been closed."""
+        self.save_unsaved_workout(session)
+        print(f"Client disconnected ({len(self.sessions)} active)")
+
+    def save_workout(self, session, summary):
+        if self.history is not None and not session.saved:
+            self.history.record(session.user, session.exercise, session.started_at, summary)
+        session.saved = True
+
+    def save_unsaved_workout(self, session):
+        # Keep workouts the client never ended, e.g. when the tab was closed or
+        # another exercise was picked. Trackers may already have stopped on
+        # their own (pull-ups once the user leaves the bar), so go by whether
+        # the workout was saved, not by tracker state.
+        if session.tracker is not None and not session.saved:
+            self.save_workout(session, session.tracker.stop())
+
+    def report_to_room(self, session, stats):
+        exercise = getattr(session.tracker, "exercise", None) or session.exercise
+        self.rooms.report(session.sid, exercise, stats)
+
+    def check_exercise(self, session, data):
+        exercise = data.get("exercise")
+        if exercise not in session.trackers:
+            print(f"Invalid exercise: {exercise}")
+            raise ClientError("Invalid exercise")
+        return exercise
+
+    def select_exercise(self, session, exercise):
+        self.save_unsaved_workout(session)
+        tracker = session.select(exercise)
+        print(f"Exercise selected: {exercise}")
+        self.report_to_room(session, tracker.session_stats())
+        return {"exercise": exercise}
+
+    def join_room(self, session, data):
+        """Returns the name of the room left, if any, and the new leaderboard."""
+        previous = self.rooms.members.get(session.sid)
+        try:
+            _, snapshot = self.rooms.join(session.sid, data.get("room", ""), data.get("name"))
+        except ValueError as e:
+            raise ClientError(str(e))
+        if session.tracker is not None:
+            self.report_to_room(session, session.tracker.session_stats())
+        return (previous.name if previous is not None else None), snapshot
+
+    def update_format(self, session, data):
+        """Switches the session's payload encoder; returns its description, if any."""
+        try:
+            encoder = make_encoder(data)
+        except (TypeError, ValueError) as e:
+            raise ClientError(str(e))
+        session.encoder = encoder
+        return encoder.describe() if hasattr(encoder, "describe") else None
+
+    def end_workout(self, session):
+        if session.tracker is None:
+            print("No active tracker to end")
+            return None
+        print("Ending workout and sending summary...")
+        summary = session.tracker.stop()
+        session.save_trace()
+        session.save_telemetry()
+        self.save_workout(session, summary)
+        return summary
+
+    def rep_curve(self, session, data):
+        if session.telemetry is None:
+            return None
+        rep_id = data.get("rep_id")
+        return {"rep_id": rep_id, **session.telemetry.rep_curve(rep_id)}
+
+    def history_sessions(self, user, params):
+        try:
+            query = sessions_query(params)
+        except (TypeError, ValueError) as e:
+            raise ClientError(str(e))
+        return self.history.sessions(user, **query)
+
+    def history_trends(self, user, params):
+        try:
+            query = trends_query(params)
+        except (TypeError, ValueError) as e:
+            raise ClientError(str(e))
+        return self.history.trends(user, **query)
+
+    def receive_frame(self, session, data, received):
+        self.metrics.inc("frames_received_total")
+        if session.mailbox.put((data, received)):
+            self.metrics.inc("frames_dropped_total")
+
+    def rep_update(self, session):
+        """session_stats to send after an update, if a rep was added."""
+        stats = rep_stats(session)
+        if stats is not None:
+            self.report_to_room(session, stats)
+        return stats
+
+    def http_get(self, path, params):
+        """Serves the HTTP endpoints; returns (status, content type, body)."""
+        if path == "/metrics":
+            if not self.metrics.enabled:
+                return 404, "text/plain", "Metrics are disabled\n"
+            return 200, "text/plain; version=0.0.4", self.metrics.render()
+        if path == "/healthz":
+            # Liveness: the process is up, whatever phase startup is in.
+            return json_response(500 if self.startup.failed else 200, self.startup.status())
+        if path == "/readyz":
+            return json_response(200 if self.startup.ready else 503, self.startup.status())
+        match = HISTORY_ROUTE.match(path)
+        if match is None:
+            return 404, "text/plain", "Not found\n"
+        if self.history is None:
+            return json_response(404, {"error": "History is disabled"})
+        user, session_id, trends = match.groups()
+        try:
+            if session_id is not None:
+                rows = self.history.session_reps(user, int(session_id))
+            elif trends:
+                rows = self.history_trends(user, params)
+            else:
+                rows = self.history_sessions(user, params)
+        except ClientError as e:
+            return json_response(400, {"error": str(e)})
+        return json_response(200, rows)
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from pushups import PushUpTracker
+from pullups import PullUpTracker
+from squats import SquatTracker
+from auto import AutoTracker
+from clock import CaptureClock
+from filters import LandmarkPredictor, make_landmark_filter
+from frames import MotionGate, RoiCropper
+from payloads import FullUpdateEncoder
+from rate_control import LoadMonitor, QualityController
+from telemetry import FrameTelemetry, telemetry_path
+from traces import TraceRecorder, trace_path
+from config import TRACE_DIR, MOTION_GATE, SPARSE_INFERENCE
+from config import TELEMETRY_CAPACITY, TELEMETRY_DIR, TELEMETRY_FORMAT
+
+TRACKER_CLASSES = {
+    "pushups": PushUpTracker,
+    "pullups": PullUpTracker,
+    "squats": SquatTracker,
+    "auto": AutoTracker,
+}
+
+
+class FrameMailbox:
+    def __init__(self):
+        self.frame = None
+        self.received = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def put(self, frame):
+        with self.lock:
+            replaced = self.frame is not None
+            if replaced:
+                self.dropped += 1
+            self.frame = frame
+            self.received += 1
+        return replaced
+
+    def take(self):
+        with self.lock:
+            frame, self.frame = self.frame, None
+            return frame
+
+    def pending(self):
+        return self.frame is not None
+
+
+class Session:
+    def __init__(self, sid, monitor, user=None):
+        self.sid = sid
+        self.user = user or sid
+        self.closed = False
+        self.trackers = {name: cls() for name, cls in TRACKER_CLASSES.items()}
+        self.exercise = None
+        self.tracker = None
+        self.started_at = None
+        # Whether the current workout has gone to history, so it is saved
+        # exactly once however it ends.
+        self.saved = False
+        self.clock = CaptureClock()
+        self.reported_reps = 0
+        self.mailbox = FrameMailbox()
+        self.recorder = None
+        self.telemetry = None
+        self.encoder = FullUpdateEncoder()
+        self.cropper = RoiCropper()
+        self.landmark_filter = make_landmark_filter()
+        self.motion_gate = MotionGate() if MOTION_GATE else None
+        self.predictor = LandmarkPredictor() if SPARSE_INFERENCE else None
+        self.last_landmarks = None
+        self.quality = QualityController(monitor)
+        self.lock = threading.Lock()
+
+    def select(self, exercise):
+        self.save_trace()
+        self.save_telemetry()
+        self.exercise = exercise
+        self.tracker = self.trackers.get(exercise)
+        self.saved = False
+        self.encoder.reset()
+        self.reported_reps = 0
+        self.clock.reset()
+        self.landmark_filter.reset()
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        if self.predictor is not None:
+            self.predictor.reset()
+        self.last_landmarks = None
+        if self.tracker:
+            self.started_at = time.time()
+            self.tracker.start(now=self.started_at)
+            if TRACE_DIR:
+                self.recorder = TraceRecorder(exercise)
+            if TELEMETRY_CAPACITY:
+                # Allocated once per session and reused for every workout.
+                if self.telemetry is None:
+                    self.telemetry = FrameTelemetry()
+                self.telemetry.reset(exercise)
+        return self.tracker
+
+    def save_trace(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder is None or recorder.count == 0:
+            return None
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        path = trace_path(TRACE_DIR, recorder.exercise, self.sid)
+        recorder.save(path)
+        print(f"Saved landmark trace ({recorder.count} frames) to {path}")
+        return path
+
+    def save_telemetry(self):
+        telemetry = self.telemetry
+        if not TELEMETRY_DIR or telemetry is None or telemetry.frames == 0 or telemetry.exported:
+            return None
+        os.makedirs(TELEMETRY_DIR, exist_ok=True)
+        path = telemetry_path(TELEMETRY_DIR, telemetry.exercise, self.sid, TELEMETRY_FORMAT)
+        telemetry.save(path, TELEMETRY_FORMAT)
+        print(f"Saved telemetry ({telemetry.frames} frames, {telemetry.reps} reps) to {path}")
+        return path
+
+
+class SessionManager:
+    def __init__(self, backend, reserve_on_open=True):
+        self.backend = backend
+        # With reserve_on_open off, connections only take a pose estimator
+        # once reserve() is called, so idle clients cost no inference slot.
+        self.reserve_on_open = reserve_on_open
+        self.monitor = LoadMonitor()
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def open(self, sid, user=None):
+        if self.reserve_on_open and not self.backend.open(sid):
+            return None
+        session = Session(sid, self.monitor, user)
+        with self.lock:
+            self.sessions[sid] = session
+        return session
+
+    def reserve(self, session):
+        return self.backend.open(session.sid)
+
+    def get(self, sid):
+        with self.lock:
+            return self.sessions.get(sid)
+
+    def close(self, sid):
+        with self.lock:
+            session = self.sessions.pop(sid, None)
+        if session is None:
+            return None
+        with session.lock:
+            session.closed = True
+            session.save_trace()
+            session.save_telemetry()
+        self.backend.close(sid)
+        return session
+
+    def __len__(self):
+        with self.lock:
+            return len(self.sessions)
@@ -1,87 +1,61 @@
 import time
-from utils import angle_3d, avg, ValueSmoother
+from reps import RepLog
+from features import KNEE_ANGLE, LEFT_HIP_ANGLE, HIP_X, HIP_Y
 from config import *
 
+REP_FIELDS = (
+    "start_time", "end_time", "start_hip_y", "min_hip_y", "start_hip_x",
+    "max_hip_back", "min_knee_angle", "min_hip_angle", "max_hip_angle",
+    "partial_top", "depth",
+)
+REP_FLAGS = (
+    "go lower", "a little lower", "bend knees more", "stick out butt",
+    "keep back straight", "too_fast",
+)
+
 class SquatTracker:
-    def __init__(self):
+    def __init__(self, clock=time.time):
+        self.clock = clock
         self.state = "idle"
         self.motion_state = "up"
         self.rep_count = 0
-        self.reps = []
+        self.reps = RepLog(REP_FIELDS, REP_FLAGS)
         self.current_rep = None
         self.last_transition_time = 0
         self.out_of_position_start = None
-        self.knee_smoother = ValueSmoother(SMOOTHING_WINDOW)
-        self.hip_angle_smoother = ValueSmoother(SMOOTHING_WINDOW)
-        self.hip_x_smoother = ValueSmoother(SMOOTHING_WINDOW)
         self.standing_hip_y = None
 
-    def start(self):
+    def start(self, now=None):
         self.state = "active"
         self.motion_state = "up"
         self.rep_count = 0
-        self.reps = []
+        self.reps = RepLog(REP_FIELDS, REP_FLAGS)
         self.current_rep = None
-        self.last_transition_time = time.time()
+        self.last_transition_time = self.clock() if now is None else now
         self.out_of_position_start = None
         self.standing_hip_y = None
-        self.knee_smoother.clear()
-        self.hip_angle_smoother.clear()
-        self.hip_x_smoother.clear()
 
     def stop(self):
         self.state = "idle"
-        full = sum(1 for r in self.reps if r["quality"] == "full")
-        good = sum(1 for r in self.reps if r["quality"] == "good")
-        partial = sum(1 for r in self.reps if r["quality"] == "partial")
-        poor = sum(1 for r in self.reps if r["quality"] == "poor")
-        avg_score = sum(r["score"] for r in self.reps) / len(self.reps) if self.reps else 0
-        avg_duration = sum(r["duration"] for r in self.reps) / len(self.reps) if self.reps else 0
-        flags = []
-        for r in self.reps:
-            flags.extend(r["flags"])
-        flag_counts = {}
-        for f in flags:
-            flag_counts[f] = flag_counts.get(f, 0) + 1
-        return {
-            "total_reps": self.rep_count,
-            "full_reps": full,
-            "good_reps": good,
-            "partial_reps": partial,
-            "poor_reps": poor,
-            "avg_score": round(avg_score, 1),
-            "avg_duration": round(avg_duration, 2),
-            "common_issues": sorted(flag_counts.items(), key=lambda x: x[1], reverse=True)[:3],
-            "reps_data": self.reps,
-        }
-
-    def get_knee_angle(self, landmarks):
-        lh, lk, la = landmarks[23], landmarks[25], landmarks[27]
-        rh, rk, ra = landmarks[24], landmarks[26], landmarks[28]
-        left = angle_3d(lh, lk, la)
-        right = angle_3d(rh, rk, ra)
-        return avg(left, right)
+        return self.reps.summary()
 
-    def get_hip_angle(self, landmarks):
-        ls = landmarks[11]
-        lh, lk = landmarks[23], landmarks[25]
-        return angle_3d(ls, lh, lk)
+    def session_stats(self):
+        return self.reps.stats.to_dict()
 
-    def update(self, landmarks):
+    def update(self, features, now=None):
         if self.state != "active":
             return
-        ls, rs = landmarks[11], landmarks[12]
-        lh, rh = landmarks[23], landmarks[24]
-        hip_y = avg(lh.y, rh.y)
-        hip_x = self.hip_x_smoother.add(avg(lh.x, rh.x))
-        shoulder_x = avg(ls.x, rs.x)
-        knee_angle = self.knee_smoother.add(self.get_knee_angle(landmarks))
-        hip_angle = self.hip_angle_smoother.add(self.get_hip_angle(landmarks))
+        if now is None:
+            now = self.clock()
+        hip_y = features[HIP_Y]
+        hip_x = features[HIP_X]
+        knee_angle = features[KNEE_ANGLE]
+        hip_angle = features[LEFT_HIP_ANGLE]
         if self.standing_hip_y is None:
             if knee_angle > 165:
                 self.standing_hip_y = hip_y
             return
-        current_time = time.time()
+        current_time = now
         time_since_transition = current_time - self.last_transition_time
         if self.motion_state == "up" and knee_angle < SQUAT_DOWN_ANGLE:
             if time_since_transition > SQUAT_MIN_REP_DURATION:
@@ -0,0 +1,66 @@
+import threading
+import time
+
+# Startup runs in phases so the process can bind its port and answer health
+# checks right away, while the pose model loads and warms up behind it:
+#   booting -> loading -> warming -> ready   (or failed)
+
+
+class Startup:
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.phase = "booting"
+        self.phase_started = self.started
+        self.timings = {}
+        self.error = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.phase == "ready"
+
+    @property
+    def failed(self):
+        return self.phase == "failed"
+
+    def enter(self, phase):
+        now = time.perf_counter()
+        with self.lock:
+            elapsed = self.timings[self.phase] = now - self.phase_started
+            print(f"Startup: {self.phase} took {elapsed:.2f}s")
+            self.phase = phase
+            self.phase_started = now
+
+    def start(self, backend):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, args=(backend,), name="startup", daemon=True)
+        self.thread.start()
+
+    def run(self, backend):
+        try:
+            self.enter("loading")
+            backend.load()
+            self.enter("warming")
+            backend.warm_up()
+            self.enter("ready")
+            print(f"Startup: ready to serve after {time.perf_counter() - self.started:.2f}s")
+        except Exception as e:
+            print(f"Startup failed: {e!r}")
+            with self.lock:
+                self.phase = "failed"
+                self.error = str(e)
+
+    def status(self):
+        with self.lock:
+            status = {
+                "phase": self.phase,
+                "ready": self.phase == "ready",
+                "uptime": round(time.perf_counter() - self.started, 3),
+                "timings": {phase: round(seconds, 3) for phase, seconds in self.timings.items()},
+            }
+            if self.error is not None:
+                status["error"] = self.error
+            return status
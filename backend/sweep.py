@@ -0,0 +1,545 @@
+import argparse
+import itertools
+import json
+import sys
+import numpy as np
+import pullups
+import pushups
+import squats
+from bench import find_traces, replay, trace_features
+from features import (
+    ELBOW_ANGLE,
+    KNEE_ANGLE,
+    LEFT_HIP_ANGLE,
+    LEFT_KNEE_ANGLE,
+    HIP_X,
+    HIP_Y,
+    SHOULDER_Y,
+    WRIST_Y,
+    LEFT_WRIST_Y,
+    RIGHT_WRIST_Y,
+    CHIN_CLEARANCE,
+    NUM_FEATURES,
+)
+from reps import QUALITIES
+from traces import load_trace
+
+# Re-scores recorded traces under grids of tracker thresholds. Each tracker's
+# state machine is restated below as array operations over a (session,
+# config) grid, so one pass over the frames evaluates every combination for
+# a whole batch of sessions at once. These models must follow the trackers;
+# --verify replays the current thresholds through the real trackers and
+# checks that both agree.
+
+SCORE_BINS = 101
+QUALITY_BOUNDS = (90, 70, 50)
+BATCH_SIZE = 256
+CHUNK_FRAMES = 1024
+
+
+def expand_grid(model, grid):
+    unknown = sorted(set(grid) - set(model.params))
+    if unknown:
+        raise ValueError(f"Unknown {model.exercise} threshold(s): {', '.join(unknown)}")
+    defaults = model.defaults()
+    names = list(grid)
+    return [
+        {**defaults, **dict(zip(names, combo))}
+        for combo in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+class SweepModel:
+    exercise = None
+    module = None
+    params = ()
+
+    def __init__(self, shape, values, start):
+        self.values = values
+        self.active = np.ones(shape, dtype=bool)
+        self.in_rep = np.zeros(shape, dtype=bool)
+        self.out_since = np.full(shape, np.nan)
+        self.last_transition = np.repeat(start[:, None], shape[1], axis=1)
+        self.rep = {name: np.zeros(shape) for name in self.fields}
+
+    @classmethod
+    def defaults(cls):
+        return {name: getattr(cls.module, name) for name in cls.params}
+
+    def begin(self, mask, **values):
+        for name, value in values.items():
+            self.rep[name] = np.where(mask, value, self.rep[name])
+
+    def track(self, op, name, value, mask):
+        op(self.rep[name], value, out=self.rep[name], where=mask)
+
+    def out_of_position(self, act, in_position, now, timeout):
+        # Mirrors the trackers' out_of_position_start timer; a stopped lane
+        # stays idle for the rest of the session.
+        out = act & ~in_position
+        waiting = np.isnan(self.out_since)
+        stop = out & ~waiting & (now - self.out_since >= timeout)
+        self.out_since = np.where(out & waiting, now, self.out_since)
+        self.out_since = np.where(act & in_position, np.nan, self.out_since)
+        self.active &= ~stop
+        return act & ~stop
+
+    def transition(self, going, done, now):
+        self.in_rep = (self.in_rep | going) & ~done
+        self.last_transition = np.where(going | done, now, self.last_transition)
+
+
+class PushUpModel(SweepModel):
+    exercise = "pushups"
+    module = pushups
+    params = (
+        "ELBOW_DOWN_ANGLE", "ELBOW_UP_ANGLE", "MIN_REP_DURATION", "SHALLOW_THRESHOLD",
+        "TARGET_HIP_ANGLE", "HIP_TOLERANCE", "MIN_KNEE_ANGLE", "OUT_OF_POSITION_TIMEOUT",
+    )
+    fields = (
+        "start_time", "min_elbow_angle", "start_shoulder_y", "max_shoulder_y",
+        "min_hip_angle", "max_hip_angle", "min_knee_angle",
+    )
+
+    def step(self, x, now, valid):
+        p = self.values
+        elbow, shoulder_y = x[:, ELBOW_ANGLE, None], x[:, SHOULDER_Y, None]
+        hip, knee = x[:, LEFT_HIP_ANGLE, None], x[:, LEFT_KNEE_ANGLE, None]
+        in_position = (hip > 140) & (shoulder_y > 0.3) & (np.abs(shoulder_y - x[:, HIP_Y, None]) < 0.3)
+        act = self.out_of_position(self.active & valid, in_position, now, p["OUT_OF_POSITION_TIMEOUT"])
+
+        since = now - self.last_transition
+        going = act & ~self.in_rep & (elbow < p["ELBOW_DOWN_ANGLE"] + 10) & (since > p["MIN_REP_DURATION"])
+        moving = act & self.in_rep
+        self.track(np.minimum, "min_elbow_angle", elbow, moving)
+        self.track(np.maximum, "max_shoulder_y", shoulder_y, moving)
+        self.track(np.minimum, "min_hip_angle", hip, moving)
+        self.track(np.maximum, "max_hip_angle", hip, moving)
+        self.track(np.minimum, "min_knee_angle", knee, moving)
+        done = moving & (elbow > p["ELBOW_UP_ANGLE"] - 5) & (since > p["MIN_REP_DURATION"])
+        self.begin(
+            going,
+            start_time=now,
+            min_elbow_angle=elbow,
+            start_shoulder_y=shoulder_y,
+            max_shoulder_y=shoulder_y,
+            min_hip_angle=hip,
+            max_hip_angle=hip,
+            min_knee_angle=knee,
+        )
+        self.transition(going, done, now)
+        return done
+
+    def score(self, now):
+        p, rep = self.values, self.rep
+        duration = now - rep["start_time"]
+        elbow, target = rep["min_elbow_angle"], p["ELBOW_DOWN_ANGLE"]
+        much_lower = elbow > target + 10
+        go_lower = ~much_lower & (elbow > target + 5)
+        little_lower = ~much_lower & ~go_lower & (elbow > target - 10)
+        flags = {
+            "much lower": much_lower,
+            "go lower": go_lower,
+            "a little lower": little_lower,
+            "low movement": rep["max_shoulder_y"] - rep["start_shoulder_y"] < p["SHALLOW_THRESHOLD"],
+            "Back bent": (
+                (rep["min_hip_angle"] < p["TARGET_HIP_ANGLE"] - p["HIP_TOLERANCE"]) |
+                (rep["max_hip_angle"] > p["TARGET_HIP_ANGLE"] + p["HIP_TOLERANCE"])
+            ),
+            "legs bent": rep["min_knee_angle"] < p["MIN_KNEE_ANGLE"],
+            "too fast": duration < p["MIN_REP_DURATION"],
+        }
+        score = (
+            100 - 50 * much_lower - 35 * go_lower
+            - np.where(little_lower & (elbow > target), 20, 10 * little_lower)
+            - 20 * flags["low movement"] - 15 * flags["Back bent"]
+            - 10 * flags["legs bent"] - 10 * flags["too fast"]
+        )
+        return score, flags
+
+
+class PullUpModel(SweepModel):
+    exercise = "pullups"
+    module = pullups
+    params = (
+        "PULLUP_MIN_REP_DURATION", "MAX_HIP_VELOCITY", "KIPPING_THRESHOLD",
+        "TARGET_HIP_ANGLE", "HIP_TOLERANCE",
+    )
+    fields = (
+        "start_time", "start_shoulder_y", "min_shoulder_y", "min_elbow_angle",
+        "max_elbow_angle", "min_chin_clearance", "min_hip_angle", "max_hip_angle", "kipped",
+    )
+
+    def __init__(self, shape, values, start):
+        super().__init__(shape, values, start)
+        self.baseline = np.full(shape, np.nan)
+        self.baseline_time = np.zeros(shape)
+        # The last two hip positions, standing in for the tracker's deque.
+        self.hip_last = np.zeros(shape)
+        self.hip_before = np.zeros(shape)
+        self.hip_seen = np.zeros(shape, dtype=np.int8)
+        self.kipping_frames = np.zeros(shape, dtype=np.int64)
+
+    def step(self, x, now, valid):
+        p = self.values
+        elbow, shoulder_y = x[:, ELBOW_ANGLE, None], x[:, SHOULDER_Y, None]
+        left_wrist_y, right_wrist_y = x[:, LEFT_WRIST_Y, None], x[:, RIGHT_WRIST_Y, None]
+        act = self.active & valid
+
+        unset = np.isnan(self.baseline)
+        found = act & unset & (np.abs(left_wrist_y - right_wrist_y) < 0.05) & (elbow > 140)
+        self.baseline = np.where(found, shoulder_y, self.baseline)
+        self.baseline_time = np.where(found, now, self.baseline_time)
+        act &= ~unset
+
+        settled = now - self.baseline_time >= 3.0
+        in_position = (left_wrist_y < shoulder_y - 0.05) | (right_wrist_y < shoulder_y - 0.05)
+        act = self.out_of_position(act & settled, in_position, now, 1.5) | (act & ~settled)
+
+        hip_x = x[:, HIP_X, None]
+        measured = act & (self.hip_seen >= 2)
+        swinging = np.abs(hip_x - self.hip_before) > p["MAX_HIP_VELOCITY"]
+        self.kipping_frames = np.where(
+            measured,
+            np.where(swinging, self.kipping_frames + 1, np.maximum(self.kipping_frames - 1, 0)),
+            self.kipping_frames,
+        )
+        self.hip_before = np.where(act, self.hip_last, self.hip_before)
+        self.hip_last = np.where(act, hip_x, self.hip_last)
+        self.hip_seen = np.where(act, np.minimum(self.hip_seen + 1, 2), self.hip_seen)
+        kipping = self.kipping_frames >= p["KIPPING_THRESHOLD"]
+
+        hip = x[:, LEFT_HIP_ANGLE, None]
+        chin = x[:, CHIN_CLEARANCE, None]
+        arm_length = np.abs(shoulder_y - x[:, WRIST_Y, None])
+        since = now - self.last_transition
+        going = (
+            act & ~self.in_rep & (shoulder_y < self.baseline - arm_length * 0.35)
+            & (since > p["PULLUP_MIN_REP_DURATION"])
+        )
+        moving = act & self.in_rep
+        self.track(np.minimum, "min_shoulder_y", shoulder_y, moving)
+        self.track(np.minimum, "min_elbow_angle", elbow, moving)
+        self.track(np.maximum, "max_elbow_angle", elbow, moving)
+        self.track(np.minimum, "min_chin_clearance", chin, moving)
+        self.track(np.minimum, "min_hip_angle", hip, moving)
+        self.track(np.maximum, "max_hip_angle", hip, moving)
+        self.track(np.maximum, "kipped", kipping.astype(float), moving)
+        done = (
+            moving
+            & (shoulder_y - self.rep["min_shoulder_y"] > arm_length * 0.30)
+            & (np.abs(shoulder_y - self.baseline) < arm_length * 0.15)
+            & (since > p["PULLUP_MIN_REP_DURATION"])
+        )
+        self.begin(
+            going,
+            start_time=now,
+            start_shoulder_y=shoulder_y,
+            min_shoulder_y=shoulder_y,
+            min_elbow_angle=elbow,
+            max_elbow_angle=elbow,
+            min_chin_clearance=999,
+            min_hip_angle=hip,
+            max_hip_angle=hip,
+            kipped=0.0,
+        )
+        self.kipping_frames[done] = 0
+        self.transition(going, done, now)
+        return done
+
+    def score(self, now):
+        p, rep = self.values, self.rep
+        duration = now - rep["start_time"]
+        pull_height = rep["start_shoulder_y"] - rep["min_shoulder_y"]
+        rom = rep["max_elbow_angle"] - rep["min_elbow_angle"]
+        chin = rep["min_chin_clearance"]
+        very_fast = duration < 0.8
+        go_higher = pull_height < 0.05
+        chin_up = chin > 0.18
+        bend_more = rom < 45
+        flags = {
+            "too fast": duration < 1.2,
+            "go higher": go_higher,
+            "go a little higher": ~go_higher & (pull_height < 0.08),
+            "chin all the way up": chin_up,
+            "chin more up": ~chin_up & (chin > 0.10),
+            "bend elbows more": bend_more,
+            "bend elbows": ~bend_more & (rom < 65),
+            "dont swing": rep["kipped"] > 0,
+            "keep_back_straight": (
+                (rep["min_hip_angle"] < p["TARGET_HIP_ANGLE"] - p["HIP_TOLERANCE"]) |
+                (rep["max_hip_angle"] > p["TARGET_HIP_ANGLE"] + p["HIP_TOLERANCE"])
+            ),
+        }
+        score = (
+            100 - np.where(very_fast, 25, 10 * flags["too fast"])
+            - 35 * go_higher - 15 * flags["go a little higher"]
+            - 20 * chin_up - 10 * flags["chin more up"]
+            - 15 * bend_more - 8 * flags["bend elbows"]
+            - 8 * flags["dont swing"] - 10 * flags["keep_back_straight"]
+        )
+        return score, flags
+
+
+class SquatModel(SweepModel):
+    exercise = "squats"
+    module = squats
+    params = (
+        "SQUAT_DOWN_ANGLE", "SQUAT_UP_ANGLE", "SQUAT_MIN_REP_DURATION", "SQUAT_MIN_DEPTH",
+        "SQUAT_MIN_HIP_BACK", "SQUAT_MAX_HIP_ANGLE",
+    )
+    fields = (
+        "start_time", "start_hip_y", "min_hip_y", "start_hip_x", "max_hip_back",
+        "min_knee_angle", "min_hip_angle", "max_hip_angle",
+    )
+
+    def __init__(self, shape, values, start):
+        super().__init__(shape, values, start)
+        self.standing_hip_y = np.full(shape, np.nan)
+
+    def step(self, x, now, valid):
+        p = self.values
+        hip_y, hip_x = x[:, HIP_Y, None], x[:, HIP_X, None]
+        knee, hip = x[:, KNEE_ANGLE, None], x[:, LEFT_HIP_ANGLE, None]
+        act = self.active & valid
+        unset = np.isnan(self.standing_hip_y)
+        self.standing_hip_y = np.where(act & unset & (knee > 165), hip_y, self.standing_hip_y)
+        act &= ~unset
+
+        since = now - self.last_transition
+        going = act & ~self.in_rep & (knee < p["SQUAT_DOWN_ANGLE"]) & (since > p["SQUAT_MIN_REP_DURATION"])
+        moving = act & self.in_rep
+        self.track(np.minimum, "min_knee_angle", knee, moving)
+        self.track(np.minimum, "min_hip_y", hip_y, moving)
+        self.track(np.minimum, "min_hip_angle", hip, moving)
+        self.track(np.maximum, "max_hip_angle", hip, moving)
+        self.track(np.maximum, "max_hip_back", np.abs(hip_x - self.rep["start_hip_x"]), moving)
+        # A partial top (above 70% of the up angle) still completes the rep.
+        done = (
+            moving & (since > p["SQUAT_MIN_REP_DURATION"])
+            & ((knee > p["SQUAT_UP_ANGLE"]) | (knee > p["SQUAT_UP_ANGLE"] * 0.7))
+        )
+        self.begin(
+            going,
+            start_time=now,
+            start_hip_y=hip_y,
+            min_hip_y=hip_y,
+            start_hip_x=hip_x,
+            max_hip_back=0.0,
+            min_knee_angle=knee,
+            min_hip_angle=hip,
+            max_hip_angle=hip,
+        )
+        self.transition(going, done, now)
+        return done
+
+    def score(self, now):
+        p, rep = self.values, self.rep
+        duration = now - rep["start_time"]
+        depth = rep["start_hip_y"] - rep["min_hip_y"]
+        go_lower = depth < p["SQUAT_MIN_DEPTH"] * 0.6
+        flags = {
+            "go lower": go_lower,
+            "a little lower": ~go_lower & (depth < p["SQUAT_MIN_DEPTH"]),
+            "bend knees more": rep["min_knee_angle"] > 120,
+            "stick out butt": rep["max_hip_back"] < p["SQUAT_MIN_HIP_BACK"],
+            "keep back straight": rep["max_hip_angle"] > p["SQUAT_MAX_HIP_ANGLE"],
+            "too_fast": duration < p["SQUAT_MIN_REP_DURATION"] + 0.2,
+        }
+        score = (
+            100 - 35 * go_lower - 15 * flags["a little lower"] - 20 * flags["bend knees more"]
+            - 25 * flags["stick out butt"] - 10 * flags["keep back straight"] - 10 * flags["too_fast"]
+        )
+        return score, flags
+
+
+MODELS = {model.exercise: model for model in (PushUpModel, PullUpModel, SquatModel)}
+
+
+class SweepResults:
+    def __init__(self, model, configs, sessions):
+        self.configs = configs
+        self.flags = model.module.REP_FLAGS
+        self.histogram = np.zeros((len(configs), SCORE_BINS), dtype=np.int64)
+        self.flag_counts = np.zeros((len(configs), len(self.flags)), dtype=np.int64)
+        self.rep_counts = np.zeros((sessions, len(configs)), dtype=np.int64)
+        self.score_sums = np.zeros((sessions, len(configs)), dtype=np.int64)
+
+    def add(self, rows, done, score, flags):
+        session, config = np.nonzero(done)
+        score = np.maximum(score[session, config], 0).astype(np.int64)
+        rows = rows[session]
+        np.add.at(self.histogram, (config, score), 1)
+        np.add.at(self.rep_counts, (rows, config), 1)
+        np.add.at(self.score_sums, (rows, config), score)
+        raised = np.stack([flags[name][session, config] for name in self.flags], axis=1)
+        np.add.at(self.flag_counts, config, raised.astype(np.int64))
+
+    def summary(self, i):
+        histogram = self.histogram[i]
+        total = int(histogram.sum())
+        bins = np.arange(SCORE_BINS)
+        cumulative = np.cumsum(histogram)
+        p10, p50, p90 = (
+            np.searchsorted(cumulative, np.ceil([0.1 * total, 0.5 * total, 0.9 * total])).tolist()
+            if total else (0, 0, 0)
+        )
+        bounds = (SCORE_BINS,) + QUALITY_BOUNDS + (0,)
+        quality = {
+            name: int(histogram[low:high].sum())
+            for name, high, low in zip(QUALITIES, bounds, bounds[1:])
+        }
+        return {
+            "config": self.configs[i],
+            "total_reps": total,
+            "reps_per_session": round(total / len(self.rep_counts), 2) if len(self.rep_counts) else 0,
+            "avg_score": round(float(histogram @ bins) / total, 1) if total else 0,
+            "p10_score": p10,
+            "p50_score": p50,
+            "p90_score": p90,
+            "quality": quality,
+            "flag_rates": {
+                name: round(int(count) / total, 3) if total else 0
+                for name, count in zip(self.flags, self.flag_counts[i])
+            },
+        }
+
+
+def sweep(sessions, exercise, grid, batch_size=BATCH_SIZE):
+    """Scores sessions under every combination of threshold values in grid.
+
+    sessions is a list of (features, timestamps, start) triples, as the
+    trackers would see them; grid maps threshold names to candidate values,
+    and thresholds left out keep their current value.
+    """
+    model = MODELS[exercise]
+    configs = expand_grid(model, grid)
+    values = {name: np.array([config[name] for config in configs], dtype=np.float64) for name in model.params}
+    results = SweepResults(model, configs, len(sessions))
+    # Similar lengths go in the same batch so little time is spent on padding.
+    order = sorted(range(len(sessions)), key=lambda i: len(sessions[i][1]))
+    for offset in range(0, len(order), batch_size):
+        rows = np.array(order[offset:offset + batch_size])
+        run_batch(model, [sessions[i] for i in rows], values, rows, results)
+    return results
+
+
+def run_batch(model, batch, values, rows, results):
+    length = max(len(timestamps) for _, timestamps, _ in batch)
+    start = np.array([start for _, _, start in batch], dtype=np.float64)
+    state = model((len(batch), len(results.configs)), values, start)
+    for first in range(0, length, CHUNK_FRAMES):
+        frames = min(CHUNK_FRAMES, length - first)
+        features = np.zeros((frames, len(batch), NUM_FEATURES))
+        times = np.zeros((frames, len(batch)))
+        valid = np.zeros((frames, len(batch)), dtype=bool)
+        for j, (session_features, timestamps, _) in enumerate(batch):
+            n = max(0, min(frames, len(timestamps) - first))
+            features[:n, j] = session_features[first:first + n]
+            times[:n, j] = timestamps[first:first + n]
+            valid[:n, j] = True
+        for t in range(frames):
+            now = times[t, :, None]
+            done = state.step(features[t], now, valid[t, :, None])
+            if done.any():
+                score, flags = state.score(now)
+                results.add(rows, done, score, flags)
+
+
+def parse_values(text):
+    if ":" in text:
+        low, high, step = (float(part) for part in text.split(":"))
+        # Inclusive of high, give or take rounding.
+        return np.round(np.arange(low, high + step / 2, step), 6).tolist()
+    return [float(part) for part in text.split(",")]
+
+
+def parse_grid(settings):
+    grid = {}
+    for setting in settings:
+        name, _, values = setting.partition("=")
+        if not values:
+            raise ValueError(f"Expected NAME=values, got {setting!r}")
+        grid[name.strip()] = parse_values(values)
+    return grid
+
+
+def load_sessions(paths, exercise):
+    sessions, names = [], []
+    for path in paths:
+        trace = load_trace(path)
+        if trace.exercise != exercise:
+            continue
+        features, timestamps = trace_features(trace)
+        start = trace.timestamps[0] if len(trace.timestamps) else 0.0
+        sessions.append((features, timestamps, start))
+        names.append(path)
+    return sessions, names
+
+
+def verify(paths, sessions, exercise):
+    """Checks the current thresholds against the real tracker, per trace."""
+    results = sweep(sessions, exercise, {})
+    mismatches = 0
+    for i, path in enumerate(paths):
+        summary, _ = replay(load_trace(path), exercise)
+        expected = (summary["total_reps"], sum(rep["score"] for rep in summary["reps_data"]))
+        got = (int(results.rep_counts[i, 0]), int(results.score_sums[i, 0]))
+        if got != expected:
+            mismatches += 1
+            print(f"  MISMATCH {path}: tracker {expected[0]} reps / {expected[1]} points, "
+                  f"sweep {got[0]} reps / {got[1]} points", file=sys.stderr)
+    print(f"{len(paths) - mismatches}/{len(paths)} traces match the tracker", file=sys.stderr)
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score recorded traces under grids of tracker thresholds.")
+    parser.add_argument("paths", nargs="+", help="trace files or directories of traces")
+    parser.add_argument("-e", "--exercise", required=True, choices=sorted(MODELS))
+    parser.add_argument(
+        "--set", dest="settings", action="append", default=[], metavar="NAME=VALUES",
+        help="threshold values to try, as a list (a,b,c) or an inclusive range (start:stop:step)",
+    )
+    parser.add_argument("--sort", default="avg_score", help="order configs by this summary field")
+    parser.add_argument("--top", type=int, default=20, help="print this many configs")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="sessions evaluated together")
+    parser.add_argument("--verify", action="store_true", help="check the engine against the real tracker first")
+    parser.add_argument("--json", help="write every config's summary to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        grid = parse_grid(args.settings)
+        expand_grid(MODELS[args.exercise], grid)
+    except ValueError as e:
+        parser.error(f"{e} (tunable: {', '.join(MODELS[args.exercise].params)})")
+    paths = find_traces(args.paths)
+    sessions, paths = load_sessions(paths, args.exercise)
+    if not sessions:
+        parser.error(f"no {args.exercise} traces found")
+
+    if args.verify and verify(paths, sessions, args.exercise):
+        return 1
+
+    results = sweep(sessions, args.exercise, grid, args.batch)
+    summaries = [results.summary(i) for i in range(len(results.configs))]
+    ranked = sorted(summaries, key=lambda s: s[args.sort], reverse=True)
+    print(f"{len(sessions)} sessions, {len(summaries)} configs", file=sys.stderr)
+    print(f"{'reps':>7} {'/sess':>6} {'avg':>5} {'p10':>4} {'p50':>4} {'p90':>4}  {'top flag':24} config")
+    for s in ranked[:args.top]:
+        flag, rate = max(s["flag_rates"].items(), key=lambda item: item[1])
+        changed = " ".join(f"{name}={s['config'][name]:g}" for name in grid) or "(current)"
+        print(
+            f"{s['total_reps']:>7} {s['reps_per_session']:>6} {s['avg_score']:>5} "
+            f"{s['p10_score']:>4} {s['p50_score']:>4} {s['p90_score']:>4}  "
+            f"{f'{flag} {rate:.0%}':24} {changed}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
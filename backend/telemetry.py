@@ -0,0 +1,162 @@
+import json
+import os
+import time
+from operator import itemgetter
+import numpy as np
+from features import (
+    ELBOW_ANGLE,
+    KNEE_ANGLE,
+    LEFT_HIP_ANGLE,
+    SHOULDER_Y,
+    HIP_Y,
+    WRIST_Y,
+    HIP_X,
+    CHIN_CLEARANCE,
+)
+from config import TELEMETRY_CAPACITY, TELEMETRY_MAX_REPS
+
+# Feature columns kept for every frame the tracker sees. The positions come
+# from filtered landmarks, so they are the smoothed curves the tracker used.
+COLUMNS = {
+    "elbow_angle": ELBOW_ANGLE,
+    "knee_angle": KNEE_ANGLE,
+    "hip_angle": LEFT_HIP_ANGLE,
+    "shoulder_y": SHOULDER_Y,
+    "hip_y": HIP_Y,
+    "wrist_y": WRIST_Y,
+    "hip_x": HIP_X,
+    "chin_clearance": CHIN_CLEARANCE,
+}
+
+IDLE, READY, IN_REP = range(3)
+STATES = ("idle", "ready", "in_rep")
+
+pick_columns = itemgetter(*COLUMNS.values())
+
+
+def tracker_state(tracker):
+    if tracker.state != "active":
+        return IDLE
+    return IN_REP if tracker.current_rep is not None else READY
+
+
+class FrameTelemetry:
+    """Fixed-capacity ring of per-frame features with rep boundaries.
+
+    All arrays are allocated up front, so a session's footprint is known in
+    advance and recording a frame only writes into them. Once full, the
+    oldest frames are overwritten. Frames and rep boundaries are numbered
+    from the start of the workout, so a rep whose frames have been
+    overwritten can still be recognized as such.
+    """
+
+    def __init__(self, capacity=TELEMETRY_CAPACITY, max_reps=TELEMETRY_MAX_REPS):
+        self.capacity = capacity
+        self.max_reps = max_reps
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.features = np.zeros((capacity, len(COLUMNS)), dtype=np.float32)
+        self.states = np.zeros(capacity, dtype=np.int8)
+        self.rep_bounds = np.zeros((max_reps, 2), dtype=np.int64)
+        self.reset()
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.features.nbytes + self.states.nbytes + self.rep_bounds.nbytes
+
+    def reset(self, exercise=None):
+        self.exercise = exercise
+        self.frames = 0
+        self.reps = 0
+        self.rep_start = 0
+        self.last_state = IDLE
+        self.exported = False
+
+    def record(self, now, features, state, rep_count):
+        frame = self.frames
+        i = frame % self.capacity
+        self.timestamps[i] = now
+        self.features[i] = pick_columns(features)
+        self.states[i] = state
+        if state == IN_REP and self.last_state != IN_REP:
+            self.rep_start = frame
+        # A rep ends on the frame that completes it, which is never IN_REP.
+        while self.reps < rep_count:
+            self.rep_bounds[self.reps % self.max_reps] = (self.rep_start, frame)
+            self.reps += 1
+        self.last_state = state
+        self.frames = frame + 1
+
+    def columns(self):
+        """Returns the buffered frames, oldest first, as named columns."""
+        first = max(0, self.frames - self.capacity)
+        frame = np.arange(first, self.frames)
+        rows = frame % self.capacity
+        reps = self.rep_table()
+        # The rep each frame belongs to, or 0 between reps.
+        rep_id = np.zeros(len(frame), dtype=np.int32)
+        for i, start, end in zip(reps["rep_id"], reps["start_frame"], reps["end_frame"]):
+            rep_id[max(start, first) - first:end + 1 - first] = i
+        columns = {
+            "frame": frame,
+            "timestamp": self.timestamps[rows],
+            "state": self.states[rows],
+            "rep_id": rep_id,
+        }
+        for k, name in enumerate(COLUMNS):
+            columns[name] = self.features[rows, k]
+        return columns
+
+    def rep_table(self):
+        """Frame ranges (inclusive) of the reps still buffered."""
+        first_rep = max(0, self.reps - self.max_reps)
+        rep = np.arange(first_rep, self.reps)
+        bounds = self.rep_bounds[rep % self.max_reps]
+        first_frame = max(0, self.frames - self.capacity)
+        kept = bounds[:, 1] >= first_frame
+        return {
+            "rep_id": rep[kept] + 1,
+            "start_frame": bounds[kept, 0],
+            "end_frame": bounds[kept, 1],
+        }
+
+    def rep_curve(self, rep_id):
+        columns = self.columns()
+        mask = columns["rep_id"] == rep_id
+        return {name: values[mask].tolist() for name, values in columns.items() if name != "rep_id"}
+
+    def save(self, path, format="npz"):
+        save_telemetry(path, self.columns(), self.rep_table(), self.exercise, format)
+        self.exported = True
+
+
+def save_telemetry(path, columns, reps, exercise, format="npz"):
+    if format == "npz":
+        np.savez(
+            path,
+            exercise=np.array(exercise or ""),
+            states=np.array(STATES),
+            rep_ids=reps["rep_id"],
+            rep_start_frames=reps["start_frame"],
+            rep_end_frames=reps["end_frame"],
+            **columns,
+        )
+        return
+    if format == "arrow":
+        # Optional dependency, only needed for Arrow export.
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        metadata = {
+            "exercise": exercise or "",
+            "states": json.dumps(STATES),
+            "reps": json.dumps({name: values.tolist() for name, values in reps.items()}),
+        }
+        table = pa.table(columns).replace_schema_metadata(metadata)
+        feather.write_feather(table, path, compression="uncompressed")
+        return
+    raise ValueError(f"Unknown telemetry format: {format}")
+
+
+def telemetry_path(directory, exercise, sid, format="npz"):
+    extension = "arrow" if format == "arrow" else "npz"
+    name = time.strftime("%Y%m%d-%H%M%S") + f"-{exercise}-{sid}-telemetry.{extension}"
+    return os.path.join(directory, name)
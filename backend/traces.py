@@ -0,0 +1,47 @@
+import os
+import time
+from collections import namedtuple
+import numpy as np
+from utils import NUM_LANDMARKS
+
+Trace = namedtuple("Trace", ["landmarks", "timestamps", "exercise"])
+
+
+class TraceRecorder:
+    def __init__(self, exercise, capacity=1024):
+        self.exercise = exercise
+        self.landmarks = np.empty((capacity, NUM_LANDMARKS, 4), dtype=np.float32)
+        self.timestamps = np.empty(capacity, dtype=np.float64)
+        self.count = 0
+
+    def add(self, timestamp, landmarks):
+        if self.count == len(self.timestamps):
+            self.landmarks = np.concatenate([self.landmarks, np.empty_like(self.landmarks)])
+            self.timestamps = np.concatenate([self.timestamps, np.empty_like(self.timestamps)])
+        # Frames without a detected pose are kept as NaN rows so the trace
+        # still reflects the gaps the tracker saw.
+        self.landmarks[self.count] = np.nan if landmarks is None else landmarks
+        self.timestamps[self.count] = timestamp
+        self.count += 1
+
+    def save(self, path):
+        save_trace(path, self.landmarks[:self.count], self.timestamps[:self.count], self.exercise)
+
+
+def save_trace(path, landmarks, timestamps, exercise):
+    np.savez(
+        path,
+        landmarks=np.asarray(landmarks, dtype=np.float32),
+        timestamps=np.asarray(timestamps, dtype=np.float64),
+        exercise=np.array(exercise),
+    )
+
+
+def load_trace(path):
+    with np.load(path) as data:
+        return Trace(data["landmarks"], data["timestamps"], str(data["exercise"]))
+
+
+def trace_path(directory, exercise, sid):
+    name = time.strftime("%Y%m%d-%H%M%S") + f"-{exercise}-{sid}.npz"
+    return os.path.join(directory, name)
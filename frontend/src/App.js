@@ -9,11 +9,44 @@ import WorkoutSummary from './components/WorkoutSummary';
 import PongGame from './components/PongGame';
 import DumbbellBackground from './DumbbellBackground';
 
+// Joints read by CameraFeed, PositionBar and PongGame.
+const UPDATE_JOINTS = [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28];
+
+const decodeLandmarks = (data, format) => {
+  if (!data) return [];
+  if (Array.isArray(data)) return data;
+  if (!format || data.byteLength === 0) return [];
+
+  const values = new Uint16Array(data);
+  const [low, high] = format.range;
+  const scale = (high - low) / format.levels;
+  const landmarks = [];
+  format.joints.forEach((joint, i) => {
+    landmarks[joint] = {
+      x: low + values[i * 3] * scale,
+      y: low + values[i * 3 + 1] * scale,
+      visibility: values[i * 3 + 2] / format.levels,
+    };
+  });
+  return landmarks;
+};
+
+// Identifies this browser's workout history on the server.
+const getUserId = () => {
+  let userId = localStorage.getItem('userId');
+  if (!userId) {
+    userId = crypto.randomUUID();
+    localStorage.setItem('userId', userId);
+  }
+  return userId;
+};
+
 function App() {
   const [selectedExercise, setSelectedExercise] = useState(null);
   const [gameMode, setGameMode] = useState(false);
   const [repCount, setRepCount] = useState(0);
   const [feedback, setFeedback] = useState('');
+  const [detectedExercise, setDetectedExercise] = useState(null);
   const [landmarks, setLandmarks] = useState([]);
   const [connectionStatus, setConnectionStatus] = useState('disconnected');
   const [showCountdown, setShowCountdown] = useState(false);
@@ -39,21 +72,29 @@ function App() {
       reconnection: true,
       reconnectionDelay: 1000,
       reconnectionAttempts: 5,
+      auth: { user: getUserId() },
     });
 
     socketRef.current = socket;
+    let updateFormat = null;
 
     socket.on('connect', () => {
       setConnectionStatus('connected');
+      socket.emit('update_format', { format: 'compact', joints: UPDATE_JOINTS });
       setTimeout(() => {
         socket.emit('select_exercise', { exercise: selectedExercise });
       }, 100);
     });
 
+    socket.on('update_format', (format) => {
+      updateFormat = format;
+    });
+
     socket.on('update', (data) => {
-      setRepCount(data.rep_count);
-      setFeedback(data.feedback);
-      setLandmarks(data.landmarks || []);
+      if (data.rep_count !== undefined) setRepCount(data.rep_count);
+      if (data.feedback !== undefined) setFeedback(data.feedback);
+      if (data.exercise !== undefined) setDetectedExercise(data.exercise);
+      setLandmarks(decodeLandmarks(data.landmarks, updateFormat));
     });
 
     socket.on('workout_summary', (data) => {
@@ -79,6 +120,7 @@ function App() {
     setSummaryData(null);
     setRepCount(0);
     setFeedback('');
+    setDetectedExercise(null);
     setLandmarks([]);
   };
 
@@ -106,6 +148,7 @@ function App() {
     setSummaryData(null);
     setRepCount(0);
     setFeedback('');
+    setDetectedExercise(null);
     setLandmarks([]);
   };
 
@@ -171,7 +214,7 @@ function App() {
               <WorkoutTracker 
                 repCount={repCount} 
                 feedback={feedback}
-                exercise={selectedExercise}
+                exercise={detectedExercise || selectedExercise}
                 onDone={handleDone}
                 landmarks={landmarks}
               />
@@ -7,11 +7,16 @@ const POSE_CONNECTIONS = [
   [23, 25], [25, 27], [24, 26], [26, 28],
 ];
 
+const MIN_SEND_DELAY = 100;
+const MAX_SEND_DELAY = 500;
+
 const CameraFeed = ({ socket, landmarks }) => {
   const videoRef = useRef(null);
   const captureCanvasRef = useRef(null);
   const drawCanvasRef = useRef(null);
   const frameCountRef = useRef(0);
+  const sendDelayRef = useRef(MIN_SEND_DELAY);
+  const droppedRef = useRef(0);
 
   useEffect(() => {
     const setupCamera = async () => {
@@ -37,8 +42,22 @@ const CameraFeed = ({ socket, landmarks }) => {
     }
 
     frameCountRef.current = 0;
+    sendDelayRef.current = MIN_SEND_DELAY;
+    droppedRef.current = 0;
+
+    const handleUpdate = (data) => {
+      const dropped = data.dropped_frames ?? droppedRef.current;
+      if (dropped > droppedRef.current) {
+        sendDelayRef.current = Math.min(sendDelayRef.current * 1.5, MAX_SEND_DELAY);
+      } else {
+        sendDelayRef.current = Math.max(sendDelayRef.current * 0.95, MIN_SEND_DELAY);
+      }
+      droppedRef.current = dropped;
+    };
+    socket.on('update', handleUpdate);
 
-    const interval = setInterval(() => {
+    let timeout;
+    const sendFrame = () => {
       if (
         socket.connected &&
         videoRef.current &&
@@ -51,17 +70,25 @@ const CameraFeed = ({ socket, landmarks }) => {
         canvas.width = videoRef.current.videoWidth;
         canvas.height = videoRef.current.videoHeight;
 
+        const capturedAt = Date.now();
         context.drawImage(videoRef.current, 0, 0, canvas.width, canvas.height);
 
-        const frame = canvas.toDataURL('image/jpeg', 0.8);
-        socket.emit('video_frame', { frame });
-        
+        canvas.toBlob((blob) => {
+          if (!blob || !socket.connected) return;
+          blob.arrayBuffer().then((frame) => {
+            socket.emit('video_frame', { frame, captured_at: capturedAt });
+          });
+        }, 'image/jpeg', 0.8);
+
         frameCountRef.current++;
       }
-    }, 100);
+      timeout = setTimeout(sendFrame, sendDelayRef.current);
+    };
+    timeout = setTimeout(sendFrame, sendDelayRef.current);
 
     return () => {
-      clearInterval(interval);
+      clearTimeout(timeout);
+      socket.off('update', handleUpdate);
     };
   }, [socket]);
 
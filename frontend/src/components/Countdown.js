@@ -44,6 +44,9 @@ const Countdown = ({ exercise, onComplete, onCancel }) => {
     case 'squats':
       exerciseName = 'Squats';
       break;
+    case 'auto':
+      exerciseName = 'Auto-Detect';
+      break;
     default:
       exerciseName = 'Exercise';
   }
@@ -17,13 +17,18 @@ const ExerciseSelector = ({ onSelectExercise, onSelectGame }) => {
     }
   ];
 
+  const autoMode = {
+    id: 'auto',
+    name: 'Auto-Detect',
+  };
+
   return (
     <div className="exercise-selector">
       <div className="selector-content">
         <div className="section-container">
           <h2 className="section-title">Form Tracker</h2>
           <div className="exercise-grid">
-            {exercises.map((exercise) => (
+            {[...exercises, autoMode].map((exercise) => (
               <button 
                 key={exercise.id} 
                 className="exercise-card"
@@ -9,6 +9,10 @@ const PositionBar = ({ landmarks, exercise }) => {
   const bottomYRef = useRef(null);
   const firstRepCapturedRef = useRef(false);
 
+  useEffect(() => {
+    firstRepCapturedRef.current = false;
+  }, [exercise]);
+
   useEffect(() => {
     if (!landmarks || landmarks.length === 0) return;
 
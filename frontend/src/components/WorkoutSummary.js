@@ -15,6 +15,9 @@ const WorkoutSummary = ({ data, exercise, onClose }) => {
     case 'squats':
       exerciseName = 'Squats';
       break;
+    case 'auto':
+      exerciseName = 'Auto-Detect';
+      break;
     default:
       exerciseName = 'Exercise';
   }
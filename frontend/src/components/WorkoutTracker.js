@@ -14,6 +14,9 @@ const WorkoutTracker = ({ repCount, feedback, exercise, onDone, landmarks }) =>
     case 'squats':
       exerciseName = 'Squats';
       break;
+    case 'auto':
+      exerciseName = 'Auto-Detect';
+      break;
     default:
       exerciseName = 'Exercise';
   }